@@ -32,8 +32,8 @@ def train(model: Classifier, loader: Iterable[tuple[Tensor, Tensor]], device: st
 
 @service.handler
 def evaluate(model: Classifier, loader: Iterable[tuple[Tensor, Tensor]], device: str = Depends(device)):
-    model.phase = 'evaluation'
-    for inputs, targets in loader: 
-        inputs, targets = inputs.to(device), targets.to(device)  
-        loss = model.evaluate(inputs, targets)
+    with model.context('evaluation'):
+        for inputs, targets in loader: 
+            inputs, targets = inputs.to(device), targets.to(device)  
+            loss = model.evaluate(inputs, targets)
     producer.dispatch(Evaluated(model, {"loss": loss})) 
\ No newline at end of file
@@ -33,4 +33,57 @@ def test_object_parameters():
 
     cls_override_init(Model2, excluded_args=[1], excluded_kwargs={"y"})
     model = Model2(1, 2.0, "3")
-    assert getattr(model, '__model__arguments__') == {"x": 1, "z": "3"}
\ No newline at end of file
+    assert getattr(model, '__model__arguments__') == {"x": 1, "z": "3"}
+
+
+class Model3:
+    def __init__(self, x: list, y: int = 0):
+        self.x = x
+        self.y = y
+
+def test_lazy_arguments():
+    cls_override_init(Model3)
+    values = [1, [2]]
+    model = Model3(values, y=3)
+    assert '__model__arguments__' not in model.__dict__
+    values.append(3)
+    values[1].append(3)
+    assert getattr(model, '__model__arguments__') == {"x": [1, [2]], "y": 3}
+    assert '__model__arguments__' in model.__dict__
+    assert not hasattr(Model2.__new__(Model2), '__model__arguments__')
+
+class Optimizer:
+    def __init__(self, params, lr: float = 0.1):
+        self.params = list(params)
+        self.lr = lr
+
+def test_excluded_arguments_are_not_captured():
+    from copy import deepcopy
+    from pickle import dumps, loads
+    from torch.nn import Linear
+
+    cls_override_init(Optimizer, excluded_args=[0])
+    optimizer = Optimizer(Linear(2, 2).parameters(), lr=0.01)
+    assert deepcopy(optimizer).lr == 0.01
+    assert getattr(loads(dumps(optimizer)), '__model__arguments__') == {'lr': 0.01}
+
+    cls_override_init(Model3)
+    model = Model3(iter([1, 2]), y=1)
+    assert getattr(deepcopy(model), '__model__arguments__') == {'y': 1}
+
+
+def test_registered_class_arguments():
+    from torchsystem.registry import getarguments
+
+    class Layer:
+        def __init__(self, x: int):
+            self.x = x
+
+    class Network:
+        def __init__(self, layer: type, size: int):
+            self.layer = layer(size)
+
+    cls_override_init(Layer)
+    cls_override_init(Network)
+    assert not hasattr(Layer, '__model__arguments__')
+    assert getarguments(Network(Layer, 2)) == {'layer': Layer, 'size': 2}
@@ -52,4 +52,27 @@ def test_registration():
         'name': 'Model',
         'hash': 'b12461be073bff9f5847f3f423767aa2',
         'arguments': {'x': 1, 'y': 2.0, 'z': '3'}
-    }
\ No newline at end of file
+    }
+
+
+def test_hashing():
+    from torch import ones, float16
+    from numpy import arange
+    model = Model(1, 2.0, z='3')
+    assert gethash(model) == gethash(Model(1, z='3', y=2.0))
+    assert getattr(model, '__model__hashes__') == {'md5': gethash(model)}
+    assert len(gethash(model, 'blake2b')) == 32
+    assert '__model__hash__' not in getmetadata(model)
+
+    first = Model(ones(3), float16, arange(4))
+    second = Model(ones(3), float16, arange(4))
+    third = Model(ones(3) * 2, float16, arange(4))
+    assert gethash(first) == gethash(second)
+    assert gethash(first) != gethash(third)
+
+    reordered = Model(1, 2.0, t='6', z='3')
+    assert gethash(reordered, canonical=False) != gethash(reordered)
+    renamed = Model(1, 2.0, '3')
+    previous = gethash(renamed)
+    setname(renamed, 'Renamed')
+    assert gethash(renamed) != previous
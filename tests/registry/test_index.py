@@ -0,0 +1,40 @@
+from torchsystem.registry import register, gethash
+from torchsystem.registry.index import Index, flatten
+
+@register
+class Encoder:
+    def __init__(self, layers: int, activation: str = 'relu'):
+        self.layers = layers
+
+@register
+class ViT:
+    def __init__(self, model_dimension: int, dropout: float, encoder: Encoder):
+        self.model_dimension = model_dimension
+
+def test_flatten():
+    assert flatten({'x': 1, 'encoder': {'name': 'Encoder', 'arguments': {'layers': 2}}}) == {
+        'x': 1, 'encoder.name': 'Encoder', 'encoder.layers': 2
+    }
+
+def test_index(tmp_path):
+    path = str(tmp_path / 'registry.db')
+    index = Index(path)
+    small = ViT(128, 0.1, Encoder(4))
+    large = ViT(256, 0.3, Encoder(8, 'gelu'))
+    assert index.add(small, 'data/small-1.pth') == gethash(small)
+    index.add(large)
+    index.attach(gethash(large), 'data/large-1.pth')
+    index.attach(gethash(large), 'data/large-2.pth')
+    index.close()
+
+    index = Index(path)
+    assert index.query('ViT', model_dimension=128) == [gethash(small)]
+    assert index.query(dropout=(0.2, None)) == [gethash(large)]
+    assert set(index.query('ViT', model_dimension=(None, 256))) == {gethash(small), gethash(large)}
+    assert index.query(where={'encoder.activation': 'gelu', 'encoder.layers': 8}) == [gethash(large)]
+    assert index.query('Encoder') == []
+    assert index.metadata(gethash(small)) == {'hash': gethash(small), 'name': 'ViT', 'arguments': {
+        'model_dimension': 128, 'dropout': 0.1, 'encoder': {'name': 'Encoder', 'arguments': {'layers': 4}}
+    }}
+    assert index.paths(gethash(large)) == ['data/large-1.pth', 'data/large-2.pth']
+    assert index.metadata('missing') is None
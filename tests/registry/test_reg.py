@@ -36,4 +36,143 @@ def test_registry():
     assert signature == {'x': 'int', 'y': 'float', 'z': 'str'}
 
     signature = registry.signature('bar')
-    assert signature == {'y': 'float'}
\ No newline at end of file
+    assert signature == {'y': 'float'}
+
+
+def test_lazy_registry(tmp_path, monkeypatch):
+    from os import utime
+    from sys import modules
+    (tmp_path / 'zoo.py').write_text(
+        'class ViT:\n'
+        '    def __init__(self, dimension: int, heads: int = 8):\n'
+        '        self.dimension = dimension\n'
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    cache = str(tmp_path / 'signatures.json')
+
+    registry = Registry(cache=cache)
+    registry.include('zoo:ViT')
+    registry.include('zoo:ViT', 'vit', signature={'dimension': 'int'})
+    assert registry.keys() == ['ViT', 'vit']
+    assert registry.signature('vit') == {'dimension': 'int'}
+    assert 'zoo' not in modules
+
+    assert registry.signature('ViT') == {'dimension': 'int', 'heads': 'int'}
+    assert 'zoo' in modules
+    model = registry.get('ViT')(128)
+    assert getattr(model, '__model__arguments__') == {'dimension': 128}
+    del modules['zoo']
+
+    registry = Registry(cache=cache)
+    registry.include('zoo:ViT')
+    assert registry.signature('ViT') == {'dimension': 'int', 'heads': 'int'}
+    assert 'zoo' not in modules
+
+    registry = Registry(cache=cache)
+    registry.include('zoo:ViT', excluded_kwargs={'heads'})
+    assert registry.signature('ViT') == {'dimension': 'int'}
+    del modules['zoo']
+
+    (tmp_path / 'zoo.py').write_text(
+        'class ViT:\n'
+        '    def __init__(self, dimension: int, layers: int = 6):\n'
+        '        self.dimension = dimension\n'
+    )
+    utime(tmp_path / 'zoo.py', (0, 0))
+    registry = Registry(cache=cache)
+    registry.include('zoo:ViT')
+    assert registry.signature('ViT') == {'dimension': 'int', 'layers': 'int'}
+    del modules['zoo']
+
+    (tmp_path / 'garden').mkdir()
+    (tmp_path / 'garden' / '__init__.py').write_text('')
+    (tmp_path / 'garden' / 'models.py').write_text(
+        'class MLP:\n'
+        '    def __init__(self, features: int):\n'
+        '        self.features = features\n'
+    )
+    registry = Registry(cache=cache)
+    registry.include('garden.models:MLP')
+    assert registry.signature('MLP') == {'features': 'int'}
+    del modules['garden.models'], modules['garden']
+
+    registry = Registry(cache=cache)
+    registry.include('garden.models:MLP')
+    assert registry.signature('MLP') == {'features': 'int'}
+    assert 'garden' not in modules
+
+
+def test_build():
+    from torch.nn import Module, Linear
+    from torchsystem.registry import getmetadata, gethash, setname
+
+    registry = Registry()
+
+    @registry.register
+    class Activation(Module):
+        def forward(self, input):
+            return input.relu()
+
+    @registry.register
+    class Layer(Module):
+        def __init__(self, input: int, output: int):
+            super().__init__()
+            self.linear = Linear(input, output)
+
+    @registry.register
+    class MLP(Module):
+        def __init__(self, layer: Layer, activation: Module, name: str = 'Activation'):
+            super().__init__()
+            self.layer = layer
+            self.activation = activation
+            self.name = name
+
+    model = MLP(Layer(4, 2), Activation())
+    setname(model)
+    metadata = getmetadata(model)
+    assert metadata == {'name': 'MLP', 'arguments': {
+        'layer': {'name': 'Layer', 'arguments': {'input': 4, 'output': 2}},
+        'activation': 'Activation'
+    }}
+    built = registry.build(metadata)
+    assert isinstance(built.layer, Layer) and isinstance(built.activation, Activation)
+    assert gethash(built) == gethash(model)
+
+    variant = metadata | {'arguments': metadata['arguments'] | {'name': 'Activation'}}
+    variants = registry.build_many([metadata, variant])
+    assert variants[1].name == 'Activation'
+    assert variants[0].activation is variants[1].activation
+    assert variants[0].layer is not variants[1].layer
+    assert variants[1].activation is not built.activation
+
+
+def test_build_labels():
+    from typing import Optional
+    from torch.nn import Module
+
+    registry = Registry()
+
+    @registry.register
+    class Activation(Module):
+        def forward(self, input):
+            return input.relu()
+
+    @registry.register
+    class Classifier(Module):
+        def __init__(self, label, activation: Optional[Module] = None, name: str = ''):
+            super().__init__()
+            self.label = label
+            self.activation = activation
+            self.name = name
+
+    built = registry.build({'name': 'Classifier', 'arguments': {'label': 'Activation', 'activation': 'Activation', 'name': 'Classifier'}})
+    assert built.label == 'Activation' and built.name == 'Classifier'
+    assert isinstance(built.activation, Activation)
+
+    @registry.register
+    class Tokenizer:
+        def __init__(self, size: int = 8):
+            self.size = size
+
+    built = registry.build({'name': 'Classifier', 'arguments': {'label': 'Tokenizer', 'activation': 'Tokenizer'}})
+    assert built.label == 'Tokenizer' and built.activation == 'Tokenizer'
@@ -15,4 +15,166 @@ def test_onepoch():
     model = Model()
     model.epoch = 5
     assert mock.call_count == 1
-    assert model.epoch == 5
\ No newline at end of file
+    assert model.epoch == 5
+
+
+def test_buffer_epoch():
+    from torch import tensor
+
+    class Classifier(Aggregate):
+        def __init__(self):
+            super().__init__()
+            self.register_buffer('epoch', tensor(0))
+            self.epochs = []
+
+        def onepoch(self):
+            self.epochs.append(int(self.epoch))
+
+    model = Classifier()
+    model.epoch += 1
+    model.epoch = tensor(5)
+    assert model.epochs == [1, 5] and 'epoch' not in model.__dict__
+    assert model.state_dict()['epoch'] == 5
+
+    other = Classifier()
+    other.load_state_dict(model.state_dict())
+    assert other.epoch == 5 and other.epochs == []
+
+
+def test_class_defaults():
+    from pytest import raises
+    from torch import bfloat16
+
+    with raises(AttributeError):
+        Aggregate.boundaries.add('step')
+    with raises(TypeError):
+        Aggregate.precision['train'] = bfloat16
+    assert Aggregate.boundaries == {'epoch', 'phase'} and dict(Aggregate.precision) == {}
+
+
+def test_events_boundaries():
+    class Classifier(Aggregate):
+        boundaries = {'step', 'epoch'}
+        every = 2
+
+        def __init__(self):
+            super().__init__()
+            self.epoch = 0
+
+        def fit(self, value: int):
+            self.events.enqueue(value)
+            self.commit('step')
+
+    handled = []
+    model = Classifier()
+    model.events.handlers[int] = handled.append
+    model.fit(1)
+    assert handled == []
+    model.fit(2)
+    assert handled == [1, 2]
+    model.fit(3)
+    model.phase = 'evaluation'
+    assert handled == [1, 2]
+    model.epoch = 1
+    assert handled == [1, 2, 3]
+    model.events.enqueue(4)
+    model.commit()
+    assert handled == [1, 2, 3, 4]
+
+
+def test_phase_context():
+    from torch import bfloat16, float32, ones, is_inference_mode_enabled
+    from torch.nn import Linear
+    from torchsystem.domain import phased
+
+    class Classifier(Aggregate):
+        precision = {'evaluation': bfloat16}
+
+        def __init__(self):
+            super().__init__()
+            self.layer = Linear(2, 2)
+
+        def forward(self, input):
+            return self.layer(input)
+
+        @phased('evaluation')
+        def evaluate(self, input):
+            return self(input), self.phase, is_inference_mode_enabled()
+
+    model = Classifier()
+    output, phase, inference = model.evaluate(ones(1, 2))
+    assert (output.dtype, phase, inference) == (bfloat16, 'evaluation', True)
+    assert model.phase == 'train' and not is_inference_mode_enabled()
+    with model.context():
+        assert model(ones(1, 2)).requires_grad
+        assert model(ones(1, 2)).dtype == float32
+
+    model.phase = 'evaluation'
+    @model.context('train')
+    def fit(input):
+        return model(input)
+    assert fit(ones(1, 2)).requires_grad
+    assert model.phase == 'evaluation'
+
+
+def test_phase_context_exception():
+    from pytest import raises
+
+    class Classifier(Aggregate):
+        boundaries = {'phase'}
+
+        def __init__(self):
+            super().__init__()
+            self.phases = []
+            self.resumable = True
+
+        def onphase(self):
+            self.phases.append(self.phase)
+            if self.phase == 'train' and not self.resumable:
+                raise RuntimeError('Cannot resume training')
+
+    handled = []
+    model = Classifier()
+    model.events.handlers[int] = handled.append
+    with raises(KeyError):
+        with model.context('evaluation'):
+            model.events.enqueue(1)
+            raise KeyError('input')
+    assert model.phase == 'train' and model.phases == ['evaluation', 'train']
+    assert handled == [1]
+
+    model.resumable = False
+    with raises(KeyError) as info:
+        with model.context('evaluation'):
+            raise KeyError('input')
+    assert isinstance(info.value.__cause__, RuntimeError)
+    assert model.phase == 'train' and model.phases[-1] == 'train'
+
+    with raises(RuntimeError):
+        with model.context('evaluation'):
+            pass
+
+
+def test_phase_changes():
+    from torch.nn import Linear
+
+    class Classifier(Aggregate):
+        def __init__(self):
+            super().__init__()
+            self.layer = Linear(2, 2)
+            self.phases = []
+
+        def onphase(self):
+            self.phases.append(self.phase)
+
+    model = Classifier()
+    assert not hasattr(model, 'epoch')
+    model.phase = 'train'
+    model.layer.eval()
+    model.phase = 'train'
+    assert model.phases == [] and not model.layer.training
+    model.phase = 'evaluation'
+    model.phase = 'validation'
+    model.phase = 'train'
+    assert model.phases == ['evaluation', 'train']
+    assert model.layer.training
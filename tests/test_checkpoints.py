@@ -0,0 +1,168 @@
+from os import listdir, path
+from torch import equal
+from torch.nn import Module, Linear
+from torch.optim import Adam
+from torchsystem.registry import register, gethash
+from torchsystem.registry.index import Index
+from torchsystem.checkpoints import Store
+
+@register
+class Network(Module):
+    def __init__(self, features: int):
+        super().__init__()
+        self.frozen = Linear(features, features)
+        self.head = Linear(features, 1)
+        self.frozen.requires_grad_(False)
+
+def objects(root: str) -> int:
+    directory = path.join(root, 'objects')
+    return sum(len(listdir(path.join(directory, name))) for name in listdir(directory))
+
+def test_store(tmp_path):
+    root = str(tmp_path)
+    index = Index()
+    store = Store(root, index=index)
+    model = Network(4)
+    optimizer = Adam(model.head.parameters())
+    model.head(model.frozen(model.frozen.weight)).sum().backward()
+    optimizer.step()
+
+    store.save(model, {'epoch': 1, 'nn': model.state_dict(), 'optimizer': optimizer.state_dict()}, 'epoch-1')
+    stored = objects(root)
+    model.head.weight.data.add_(1)
+    store.save(model, {'epoch': 2, 'nn': model.state_dict(), 'optimizer': optimizer.state_dict()}, 'epoch-2')
+    assert objects(root) == stored + 1
+
+    checkpoint = store.load(model, 'epoch-2')
+    assert checkpoint['epoch'] == 2
+    assert all(equal(checkpoint['nn'][key], value) for key, value in model.state_dict().items())
+    assert checkpoint['optimizer']['param_groups'][0]['betas'] == (0.9, 0.999)
+    assert list(checkpoint['optimizer']['state'].keys()) == [0, 1]
+    Adam(model.head.parameters()).load_state_dict(checkpoint['optimizer'])
+
+    assert store.tags(model) == ['epoch-1', 'epoch-2']
+    assert index.paths(gethash(model)) == [store.manifest(model, 'epoch-1'), store.manifest(model, 'epoch-2')]
+    store.delete(model, 'epoch-1')
+    assert store.collect() == 1
+    assert equal(store.load(gethash(model), 'epoch-2', mmap=False)['nn']['head.weight'], model.head.weight)
+
+def test_checkpointer(tmp_path):
+    from torchsystem.services import Consumer, Producer
+    from torchsystem.checkpoints import Checkpointer
+    from torchsystem.checkpoints.background import Checkpointed, CheckpointFailed
+
+    index = Index()
+    store = Store(str(tmp_path), index=index)
+    consumer = Consumer()
+    producer = Producer()
+    producer.register(consumer)
+    events = []
+
+    @consumer.handler
+    def on_checkpoint(event: Checkpointed | CheckpointFailed):
+        events.append(event)
+
+    checkpointer = Checkpointer(store, producer)
+    model = Network(4)
+    weights = [model.head.weight.clone(), model.head.weight.clone() + 1]
+    first = checkpointer.save(model, {'nn': model.state_dict()}, 'epoch-1')
+    model.head.weight.data.add_(1)
+    second = checkpointer.save(model, {'nn': model.state_dict()}, 'epoch-2')
+    model.head.weight.data.add_(1)
+    third = checkpointer.save(model, {'nn': model.state_dict()}, 'epoch\0')
+    checkpointer.close()
+
+    assert first.result() == store.manifest(model, 'epoch-1')
+    assert equal(store.load(model, 'epoch-1')['nn']['head.weight'], weights[0])
+    assert equal(store.load(model, 'epoch-2')['nn']['head.weight'], weights[1])
+    assert isinstance(third.exception(), ValueError)
+    assert [event.tag for event in events] == ['epoch-1', 'epoch-2', 'epoch\0']
+    assert [type(event) for event in events] == [Checkpointed, Checkpointed, CheckpointFailed]
+    assert index.metadata(gethash(model))['arguments'] == {'features': 4}
+    assert index.paths(gethash(model)) == [store.manifest(model, 'epoch-1'), store.manifest(model, 'epoch-2')]
+
+def test_chunked(tmp_path):
+    from pytest import raises
+    from torchsystem.checkpoints import chunked
+    from torchsystem.checkpoints.chunked import Reader
+
+    model = Network(64)
+    optimizer = Adam(model.parameters())
+    model.head(model.frozen(model.frozen.weight)).sum().backward()
+    optimizer.step()
+    for compression in chunked.compressors:
+        path = str(tmp_path / f'{compression}.tsc')
+        chunked.save(path, {'epoch': 3, 'nn': model.state_dict(), 'optimizer': optimizer.state_dict()}, compression, chunksize=1000, workers=1)
+        with Reader(path) as reader:
+            assert 'nn.frozen.weight' in reader
+            assert list(reader.tensors('nn.head.').keys()) == ['weight', 'bias']
+            assert equal(reader['nn.frozen.weight'], model.frozen.weight)
+            checkpoint = reader.load()
+            assert checkpoint['epoch'] == 3
+            assert all(equal(checkpoint['nn'][key], value) for key, value in model.state_dict().items())
+            Adam(model.parameters()).load_state_dict(checkpoint['optimizer'])
+
+            other = Network(64)
+            reader.load_state_dict(other, 'nn.')
+            assert equal(other.head.weight, model.head.weight)
+            with raises(KeyError):
+                reader.load_state_dict(other.head, 'nn.')
+
+def test_chunked_failures(tmp_path, monkeypatch):
+    from pytest import raises
+    from torchsystem.checkpoints import chunked
+    from torchsystem.checkpoints.chunked import Reader
+
+    def broken(data):
+        raise RuntimeError('Compression failed')
+    monkeypatch.setitem(chunked.compressors, 'broken', broken)
+    model = Network(64)
+    with raises(RuntimeError):
+        chunked.save(str(tmp_path / 'model.tsc'), {'nn': model.state_dict()}, 'broken', chunksize=1000, workers=1)
+    assert list(tmp_path.iterdir()) == []
+
+    path = tmp_path / 'model.tsc'
+    chunked.save(str(path), {'nn': model.state_dict()}, 'raw')
+    path.write_bytes(path.read_bytes()[:-4])
+    files = []
+    def tracked(*args, **kwargs):
+        files.append(open(*args, **kwargs))
+        return files[-1]
+    monkeypatch.setattr(chunked, 'open', tracked, raising=False)
+    with raises(ValueError):
+        Reader(str(path))
+    path.write_bytes(b'TS')
+    with raises(ValueError):
+        Reader(str(path))
+    assert len(files) == 2 and all(file.closed for file in files)
+
+def test_deltas(tmp_path):
+    from torchsystem.checkpoints.chunked import Reader
+    from torchsystem.checkpoints.delta import Deltas
+
+    model = Network(8)
+    optimizer = Adam(model.head.parameters())
+    deltas = Deltas(str(tmp_path), every=3)
+    def step(epoch: int) -> str:
+        optimizer.zero_grad()
+        model.head(model.frozen(model.frozen.weight)).sum().backward()
+        optimizer.step()
+        return deltas.save({'epoch': epoch, 'nn': model.state_dict(), 'optimizer': optimizer.state_dict()})
+
+    assert path.basename(step(0)) == 'base-000000.tsc'
+    with Reader(step(1)) as reader:
+        assert 'nn.frozen.weight' not in reader
+        assert 'nn.head.weight' in reader and 'optimizer.state.0.exp_avg' in reader
+    model.frozen.bias.data[-1] = 100
+    with Reader(step(2)) as reader:
+        assert 'nn.frozen.bias' in reader and 'nn.frozen.weight' not in reader
+
+    checkpoint = deltas.load()
+    assert checkpoint['epoch'] == 2
+    assert all(equal(checkpoint['nn'][key], value) for key, value in model.state_dict().items())
+    assert equal(checkpoint['optimizer']['state'][0]['exp_avg'], optimizer.state_dict()['state'][0]['exp_avg'])
+
+    assert path.basename(step(3)) == 'base-000003.tsc'
+    assert deltas.files == ['base-000003.tsc']
+    assert sorted(listdir(tmp_path)) == ['base-000003.tsc', 'chain.json']
+    assert Deltas(str(tmp_path)).load()['epoch'] == 3
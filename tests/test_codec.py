@@ -0,0 +1,43 @@
+from pytest import raises
+from torch import Tensor, equal, arange, bfloat16
+from torchsystem.services import event
+from torchsystem.services import Codec
+
+@event
+class Iterated:
+    epoch: int
+    loss: float
+    stopped: bool
+
+@event
+class Predicted:
+    name: str
+    epoch: int
+    outputs: Tensor
+
+def test_fixed_codec():
+    codec = Codec(Iterated, version=1)
+    message = codec.decode(codec.encode(Iterated(1, 0.5, False)))
+    assert message == Iterated(1, 0.5, False)
+
+    messages = [Iterated(epoch, 1 / (epoch + 1), epoch == 9) for epoch in range(10)]
+    assert codec.decode_many(codec.encode_many(messages)) == messages
+
+def test_tensor_codec():
+    codec = Codec(Predicted)
+    outputs = arange(12).reshape(3, 4).to(bfloat16)
+    message = codec.decode(codec.encode(Predicted('mlp', 2, outputs)))
+    assert message.name == 'mlp' and message.epoch == 2
+    assert equal(message.outputs, outputs)
+
+    messages = codec.decode_many(codec.encode_many([Predicted('a', 0, arange(3)), Predicted('b', 1, arange(0))]))
+    assert [message.name for message in messages] == ['a', 'b']
+    assert equal(messages[0].outputs, arange(3))
+    assert messages[1].outputs.shape == (0,)
+
+def test_schema_check():
+    data = Codec(Iterated, version=1).encode(Iterated(1, 0.5, False))
+    with raises(ValueError):
+        Codec(Iterated, version=2).decode(data)
+    with raises(ValueError):
+        Codec(Predicted).decode(data)
@@ -67,4 +67,18 @@ def test_handle_nested_depends():
 
     provider.dependency_overrides[right_node_dependency] = lambda: 13
     value = handle_dependency()
-    assert value == 2*7*11*13  
\ No newline at end of file
+    assert value == 2*7*11*13  
+
+def test_async_generator_dependency():
+    from asyncio import run
+    openmock.reset_mock()
+    closemock.reset_mock()
+
+    @inject(provider)
+    async def coroutine_function(dependency = Depends(generator_dependency)):
+        closemock.assert_not_called()
+        return dependency
+
+    assert run(coroutine_function()) == 42
+    openmock.assert_called_once()
+    closemock.assert_called_once()
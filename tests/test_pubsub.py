@@ -34,4 +34,149 @@ def test_publisher():
         publisher.publish(1.0, 'accuracy')
 
     with raises(StopIteration):
-        publisher.publish({'value': 1.0, 'name': 'accuracy'}, 'metric')
\ No newline at end of file
+        publisher.publish({'value': 1.0, 'name': 'accuracy'}, 'metric')
+
+def test_wildcards():
+    received = []
+    subscriber = Subscriber()
+
+    @subscriber.subscribe('metrics.*')
+    def on_metric(metric):
+        received.append(('*', metric))
+
+    @subscriber.subscribe('metrics.#')
+    def on_any(metric):
+        received.append(('#', metric))
+
+    publisher = Publisher()
+    publisher.register(subscriber)
+    publisher.publish(0.1, 'metrics.loss')
+    publisher.publish(0.2, 'metrics.train.loss')
+    publisher.publish(0.3, 'metrics')
+    publisher.publish(0.4, 'logs')
+    assert received == [('*', 0.1), ('#', 0.1), ('#', 0.2), ('#', 0.3)]
+    assert publisher.route('logs') == []
+
+    @subscriber.subscribe('logs')
+    def on_log(log):
+        received.append(('logs', log))
+
+    publisher.publish(0.5, 'logs')
+    assert received[-1] == ('logs', 0.5)
+
+
+def test_concurrent_fanout():
+    from threading import Event
+    from concurrent.futures import ThreadPoolExecutor
+    released = Event()
+    received = []
+
+    slow, fast, failing = Subscriber('slow'), Subscriber('fast'), Subscriber('failing')
+
+    @slow.subscribe('loss')
+    def wait_release(loss):
+        released.wait(1.0)
+
+    @fast.subscribe('loss')
+    def store(loss):
+        received.append(loss)
+
+    @failing.subscribe('loss')
+    def fail(loss):
+        raise ValueError(loss)
+
+    publisher = Publisher()
+    publisher = Publisher(executor=ThreadPoolExecutor(1))
+    publisher.register(slow, fast, failing, fast)
+    errors = publisher.gather(0.1, 'loss', timeout=0.2)
+    assert received == []
+    assert [subscriber for subscriber, _ in errors] == [slow, fast, failing, fast]
+    assert all(isinstance(error, TimeoutError) for _, error in errors)
+    released.set()
+    publisher.shutdown()
+
+    released.clear()
+    publisher = Publisher()
+    publisher.register(slow, fast, failing, fast)
+    errors = publisher.gather(0.1, 'loss', timeout=0.2)
+    assert received == [0.1, 0.1]
+    assert isinstance(errors[0][1], TimeoutError)
+    assert errors[1] == (fast, None) and errors[3] == (fast, None)
+    assert isinstance(errors[2][1], ValueError)
+
+    released.set()
+    futures = publisher.broadcast(0.2, 'loss')
+    for future in futures:
+        future.exception()
+    assert received == [0.1, 0.1, 0.2, 0.2]
+    assert publisher.latencies[fast].count == 4
+    assert publisher.latencies[failing].errors == 2
+    publisher.shutdown()
+
+
+def test_subscription_options():
+    sampled, throttled, conflated = [], [], []
+    subscriber = Subscriber()
+
+    @subscriber.subscribe('loss', every=3)
+    def sample(loss):
+        sampled.append(loss)
+
+    @subscriber.subscribe('loss', rate=1e-3)
+    def throttle(loss):
+        throttled.append(loss)
+
+    @subscriber.subscribe('metric', conflate=lambda metric: metric['name'])
+    def conflate(metric):
+        if metric['value'] == 0:
+            for value in range(1, 4):
+                subscriber.receive({'name': 'loss', 'value': value}, 'metric')
+            subscriber.receive({'name': 'accuracy', 'value': 0.9}, 'metric')
+        conflated.append(metric['value'])
+
+    publisher = Publisher()
+    publisher.register(subscriber)
+    for loss in range(7):
+        publisher.publish(loss, 'loss')
+    assert sampled == [2, 5]
+    assert throttled == [0]
+
+    publisher.publish({'name': 'loss', 'value': 0}, 'metric')
+    assert conflated == [0, 3, 0.9]
+
+
+def test_replay():
+    publisher = Publisher(history=3)
+    for epoch in range(5):
+        publisher.publish(epoch / 10, 'loss')
+        publisher.publish(epoch, 'epoch')
+    publisher.publish({'name': 'accuracy'}, 'metric')
+    publisher.publish('done', 'epoch')
+
+    received = []
+    subscriber = Subscriber()
+
+    @subscriber.subscribe('loss', 'epoch')
+    def store(message):
+        received.append(message)
+
+    publisher.register(subscriber)
+    assert received == [0.2, 0.3, 3, 0.4, 4, 'done']
+    assert isinstance(received[2], int)
+
+
+def test_replay_large_integers():
+    publisher = Publisher(history=2)
+    publisher.publish(1, 'step')
+    publisher.publish(2**63, 'step')
+    publisher.publish(-2**70, 'step')
+
+    received = []
+    subscriber = Subscriber()
+
+    @subscriber.subscribe('step')
+    def store(message):
+        received.append(message)
+
+    publisher.register(subscriber)
+    assert received == [2**63, -2**70]
@@ -19,4 +19,212 @@ def test_service():
     service.override(getdevice, lambda: device)
     service.handle('train', model)
     model.assert_called_once()
-    device.assert_called_once()
\ No newline at end of file
+    device.assert_called_once()
+
+def test_ahandle():
+    from time import sleep
+    from asyncio import run, gather, sleep as asleep
+    from threading import Lock
+    from concurrent.futures import ThreadPoolExecutor
+
+    service = Service(executor=ThreadPoolExecutor(8))
+    lock, running, peaks = Lock(), [0], []
+
+    def getscale() -> int:
+        return 2
+
+    @service.handler(concurrency=2)
+    def predict(value: int, scale: int = Depends(getscale)):
+        with lock:
+            running[0] += 1
+            peaks.append(running[0])
+        sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return value * scale
+
+    @service.handler
+    async def evaluate(value: int, scale: int = Depends(getscale)):
+        await asleep(0)
+        return value + scale
+
+    async def main():
+        return await gather(*[service.ahandle('predict', value) for value in range(6)], service.ahandle('evaluate', 1))
+
+    assert run(main()) == [0, 2, 4, 6, 8, 10, 3]
+    assert max(peaks) <= 2
+
+
+def test_batching():
+    from torch import tensor, Tensor
+    from concurrent.futures import ThreadPoolExecutor
+
+    service = Service()
+    sizes = []
+    model = Mock(side_effect=lambda inputs: inputs * 2)
+
+    @service.handler(batch=4, wait=0.5, shared={'model'})
+    def predict(model: Any, inputs: Tensor):
+        sizes.append(len(inputs))
+        return model(inputs), inputs.sum(dim=1)
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(service.handle, 'predict', model, tensor([value, 1])) for value in range(4)]
+        results = [future.result() for future in futures]
+
+    assert sizes == [4]
+    model.assert_called_once()
+    for value, (output, total) in enumerate(results):
+        assert output.tolist() == [2 * value, 2]
+        assert total.item() == value + 1
+
+
+def test_batching_arguments():
+    from pytest import raises
+    from concurrent.futures import ThreadPoolExecutor
+    from torchsystem.services.batching import Batcher
+
+    calls = []
+    def label(model: Any, labels: list):
+        calls.append((model, labels))
+        return [f'{model}-{label}' for label in labels]
+
+    batcher = Batcher(lambda model, labels: calls.append((model, labels)) or labels, size=1, wait=0)
+    assert batcher('a', 1) == 1
+    assert calls == [(['a'], [1])]
+
+    calls.clear()
+    batcher = Batcher(label, size=4, wait=0.5, shared={0})
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(batcher, model, 1) for model in ('a', 'b', 'a', 'b')]
+        assert [future.result() for future in futures] == ['a-1', 'b-1', 'a-1', 'b-1']
+    assert sorted(calls) == [('a', [1, 1]), ('b', [1, 1])]
+
+    with raises(ValueError):
+        Service().handler(batch=4, shared={'encoder'})(label)
+
+
+def test_batching_mismatched_output():
+    from pytest import raises
+    from torch import tensor
+    from concurrent.futures import ThreadPoolExecutor
+    from torchsystem.services.batching import Batcher
+
+    batcher = Batcher(lambda inputs: inputs[:-1], size=2, wait=0.5)
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(batcher, tensor([value, 1])) for value in range(2)]
+        for future in futures:
+            with raises(TypeError):
+                future.result(timeout=5)
+
+
+def test_cache():
+    from inspect import signature
+    from torch import tensor
+    from torch.nn import Module
+    from torchsystem.registry import register
+    from torchsystem.services.cache import Cache, fingerprint
+
+    @register
+    class Encoder(Module):
+        def __init__(self, features: int):
+            super().__init__()
+
+    service = Service()
+    calls = Mock()
+
+    @service.handler(cache=Cache(maxsize=2))
+    def extract(model: Any, batch: Any):
+        calls()
+        return batch * 2
+
+    encoder = Encoder(2)
+    assert service.handle('extract', encoder, tensor([1, 2])).tolist() == [2, 4]
+    assert service.handle('extract', encoder, tensor([1, 2])).tolist() == [2, 4]
+    assert service.handle('extract', Encoder(2), tensor([1, 2])).tolist() == [2, 4]
+    assert calls.call_count == 1
+
+    service.handle('extract', encoder, tensor([3, 4]))
+    service.handle('extract', encoder, tensor([5, 6]))
+    service.handle('extract', encoder, tensor([1, 2]))
+    cache = service.caches['extract']
+    assert calls.call_count == 4
+    assert len(cache) == 2
+    assert cache.hit_rate == 2 / 6
+    assert cache.memory == 2 * tensor([1, 2]).nbytes
+
+    assert len({fingerprint(1), fingerprint(1.0), fingerprint(True)}) == 3
+    assert fingerprint(tensor([1, 2]))[1] == 'cpu'
+    assert service.handlers['extract'].__name__ == 'extract'
+    assert list(signature(service.handlers['extract']).parameters) == ['model', 'batch']
+
+
+def test_async_cache():
+    from asyncio import run
+    from pytest import raises
+    from torchsystem.services.cache import Cache
+
+    service = Service()
+    calls = Mock()
+
+    @service.handler(cache=Cache())
+    async def square(value: int):
+        calls()
+        return value * value
+
+    async def main():
+        return [await service.ahandle('square', value) for value in (3, 3, 4)]
+
+    assert run(main()) == [9, 9, 16]
+    assert calls.call_count == 2
+
+    with raises(TypeError):
+        @service.handler(batch=4)
+        async def predict(inputs: Any):
+            return inputs
+
+
+def test_handle_many():
+    from concurrent.futures import ThreadPoolExecutor
+    service = Service()
+    resolved = Mock(return_value=10)
+
+    def getoffset() -> int:
+        return resolved()
+
+    @service.handler
+    def score(value: int, scale: int = 1, offset: int = Depends(getoffset)):
+        return value * scale + offset
+
+    assert list(service.handle_many('score', range(3))) == [10, 11, 12]
+    assert list(service.handle_many('score', [(1, 2), (2, 2)])) == [12, 14]
+    assert resolved.call_count == 2
+
+    with ThreadPoolExecutor(4) as executor:
+        assert list(service.handle_many('score', range(100), executor=executor, buffer=8)) == [value + 10 for value in range(100)]
+        assert sorted(service.handle_many('score', range(100), executor=executor, ordered=False)) == [value + 10 for value in range(100)]
+
+
+def test_handle_many_failure():
+    from time import sleep
+    from pytest import raises
+    from concurrent.futures import ThreadPoolExecutor
+    service = Service()
+    events = []
+
+    def getresource():
+        yield 'resource'
+        events.append('closed')
+
+    @service.handler
+    def work(value: int, resource: str = Depends(getresource)):
+        if value == 0:
+            raise ValueError(value)
+        sleep(0.05)
+        events.append(value)
+
+    with ThreadPoolExecutor(2) as executor:
+        with raises(ValueError):
+            list(service.handle_many('work', range(10), executor=executor, buffer=4))
+    assert events[-1] == 'closed'
+    assert sorted(events[:-1]) == [1, 2]
@@ -0,0 +1,96 @@
+from json import loads
+from pytest import raises
+from urllib.request import urlopen
+from torchsystem import Depends
+from torchsystem.services import Service, Consumer, Producer, Subscriber, Publisher, event
+from torchsystem.services.telemetry import Telemetry, Histogram
+
+@event
+class Trained:
+    loss: float
+
+def test_histogram():
+    histogram = Histogram()
+    for value in range(1, 10001):
+        histogram.record(value * 1000)
+    assert abs(histogram.quantile(0.5) - 5_000_000) / 5_000_000 < 0.05
+    assert abs(histogram.quantile(0.99) - 9_900_000) / 9_900_000 < 0.05
+    assert histogram.quantile(1.0) <= histogram.maximum
+
+def test_telemetry():
+    telemetry = Telemetry()
+    service = Service(telemetry=telemetry)
+    consumer = Consumer(telemetry=telemetry)
+    subscriber = Subscriber(telemetry=telemetry)
+
+    def device():
+        return 'cpu'
+
+    @service.handler
+    def train(loss: float, device: str = Depends(device)):
+        if loss < 0:
+            raise ValueError(loss)
+
+    @consumer.handler
+    def on_trained(event: Trained):
+        pass
+
+    @subscriber.subscribe('loss')
+    def on_loss(loss):
+        pass
+
+    service.handle('train', 0.1)
+    with raises(ValueError):
+        service.handle('train', -1.0)
+    producer = Producer()
+    producer.register(consumer)
+    producer.dispatch(Trained(0.1))
+    publisher = Publisher()
+    publisher.register(subscriber)
+    publisher.publish(0.1, 'loss')
+
+    snapshot = telemetry.snapshot()
+    assert snapshot['service']['train']['calls'] == 2
+    assert snapshot['service']['train']['errors'] == 1
+    assert snapshot['service']['train']['resolve']['count'] == 2
+    assert snapshot['consumer']['trained']['calls'] == 1
+    assert snapshot['subscriber']['loss']['calls'] == 1
+
+    text = telemetry.prometheus()
+    assert 'torchsystem_calls_total{kind="service",name="train"} 2' in text
+    assert 'torchsystem_errors_total{kind="service",name="train"} 1' in text
+
+    telemetry.get('subscriber', 'logs."raw"\\\n')
+    assert 'torchsystem_calls_total{kind="subscriber",name="logs.\\"raw\\"\\\\\\n"} 0' in telemetry.prometheus()
+
+    server = telemetry.serve(0)
+    try:
+        port = server.server_address[1]
+        assert 'torchsystem_calls_total' in urlopen(f'http://127.0.0.1:{port}/metrics').read().decode()
+        assert loads(urlopen(f'http://127.0.0.1:{port}/snapshot').read())['service']['train']['calls'] == 2
+    finally:
+        server.shutdown()
+
+
+def test_concurrent_telemetry():
+    from concurrent.futures import ThreadPoolExecutor
+    telemetry = Telemetry()
+    service = Service(telemetry=telemetry)
+
+    @service.handler
+    def step(value: int):
+        if value % 10 == 0:
+            raise ValueError(value)
+
+    def run(value: int):
+        try:
+            service.handle('step', value)
+        except ValueError:
+            pass
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(run, range(2000)))
+    stats = telemetry.snapshot()['service']['step']
+    assert stats['calls'] == 2000
+    assert stats['errors'] == 200
+    assert stats['handle']['count'] == 2000
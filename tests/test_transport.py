@@ -0,0 +1,92 @@
+from os import path
+from time import sleep, monotonic
+from tempfile import mkdtemp
+from threading import Thread
+from multiprocessing.connection import Client
+from pytest import raises
+from torchsystem.services import Subscriber
+from torchsystem.services import Publisher
+from torchsystem.services.transport import Sender, Receiver, ACK
+
+def until(condition, timeout: float = 5):
+    deadline = monotonic() + timeout
+    while not condition():
+        assert monotonic() < deadline, 'Timed out waiting for the condition'
+        sleep(0.01)
+
+def test_transport():
+    address = path.join(mkdtemp(), 'metrics.sock')
+    publisher = Publisher()
+    sender = Sender(address, 'metrics.#', delivery='at-least-once', batch=2, authkey=b'test')
+    publisher.register(sender)
+
+    publisher.publish(0.1, 'metrics.loss')
+    publisher.publish(0.9, 'metrics.accuracy')
+    publisher.publish('ignored', 'logs')
+
+    received = []
+    subscriber = Subscriber()
+
+    @subscriber.subscribe('metrics.loss', 'metrics.accuracy')
+    def store(metric):
+        received.append(metric)
+
+    receiver = Receiver(address, subscriber, authkey=b'test')
+    receiver.connect()
+    thread = Thread(target=receiver.run)
+    thread.start()
+    until(lambda: sender.connections)
+    publisher.publish(0.2, 'metrics.loss')
+    sender.close()
+    thread.join(timeout=5)
+    assert received == [0.1, 0.9, 0.2]
+
+
+def test_max_pending():
+    address = path.join(mkdtemp(), 'metrics.sock')
+    publisher = Publisher()
+    sender = Sender(address, delivery='at-least-once', batch=1, max_pending=2, authkey=b'test')
+    publisher.register(sender)
+    for step in range(5):
+        publisher.publish(step, 'step')
+    sender.close()
+    assert list(sender.pending.keys()) == [4, 5]
+
+
+def test_authentication():
+    address = path.join(mkdtemp(), 'metrics.sock')
+    with raises(ValueError):
+        Sender(address)
+    with raises(ValueError):
+        Receiver(address)
+
+
+def test_acknowledgements():
+    address = path.join(mkdtemp(), 'metrics.sock')
+    publisher = Publisher()
+    sender = Sender(address, delivery='at-least-once', batch=1, interval=0.01, authkey=b'test')
+    publisher.register(sender)
+    silent = Client(address, authkey=b'test')
+
+    received = []
+    subscriber = Subscriber()
+
+    @subscriber.subscribe('step')
+    def store(step):
+        received.append(step)
+
+    receiver = Receiver(address, subscriber, authkey=b'test')
+    receiver.connect()
+    thread = Thread(target=receiver.run)
+    thread.start()
+    until(lambda: len(sender.connections) == 2)
+    publisher.publish(1, 'step')
+    until(lambda: max(list(sender.acknowledged.values())) == 1)
+    assert received == [1]
+    assert list(sender.pending.keys()) == [1]
+
+    silent.send_bytes(ACK.pack(1))
+    until(lambda: not sender.pending)
+    sender.close()
+    silent.close()
+    thread.join(timeout=5)
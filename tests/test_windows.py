@@ -0,0 +1,34 @@
+from pytest import approx
+from torchsystem.services import Publisher, Subscriber
+from torchsystem.services.windows import Summarizer, Summary
+
+def test_summarizer():
+    summaries = []
+    subscriber = Subscriber()
+
+    @subscriber.subscribe('summaries')
+    def store(summary: Summary):
+        summaries.append(summary)
+
+    publisher = Publisher()
+    summarizer = Summarizer(publisher, 'metrics.#', window=4, every=3, alpha=0.5, quantiles=(0.5,))
+    publisher.register(summarizer, subscriber)
+
+    for value in range(1, 7):
+        publisher.publish({'name': 'loss', 'value': value}, 'metrics.train')
+    publisher.publish({'name': 'accuracy', 'value': 0.9}, 'metrics.train')
+
+    assert [summary.count for summary in summaries] == [3, 6]
+    last = summaries[-1]
+    assert last.name == 'loss'
+    assert (last.minimum, last.maximum, last.mean) == (3, 6, 4.5)
+    assert last.quantiles[0.5] == approx(4.5)
+
+    ema = 1.0
+    for value in range(2, 7):
+        ema = 0.5 * ema + 0.5 * value
+    assert last.ema == approx(ema)
+
+    summarizer.flush()
+    assert summaries[-1].name == 'accuracy'
+    assert summaries[-1].mean == approx(0.9)
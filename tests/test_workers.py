@@ -0,0 +1,36 @@
+from os import getpid
+from asyncio import run
+from pytest import raises
+from torch import Tensor, ones
+from torchsystem import Depends
+from torchsystem.services import Service
+from torchsystem.services.workers import Workers
+
+workers = Workers(processes=2)
+service = Service()
+
+def getscale() -> int:
+    return 3
+
+@service.handler(workers=workers)
+def scale(input: Tensor, scale: int = Depends(getscale)):
+    return input * scale, getpid()
+
+def test_workers():
+    try:
+        output, pid = service.handle('scale', ones(4))
+        assert output.tolist() == [3, 3, 3, 3]
+        assert pid != getpid()
+
+        output, pid = run(service.ahandle('scale', ones(2)))
+        assert output.tolist() == [3, 3]
+        assert pid != getpid()
+    finally:
+        workers.shutdown()
+
+
+def test_coroutine_handlers():
+    with raises(TypeError):
+        @service.handler(workers=workers)
+        async def evaluate(input: Tensor):
+            return input
@@ -0,0 +1,2 @@
+from torchsystem.checkpoints.store import Store as Store
+from torchsystem.checkpoints.background import Checkpointer as Checkpointer
\ No newline at end of file
@@ -0,0 +1,169 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from time import perf_counter
+from typing import Any
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import torch
+from torch import Tensor
+
+from torchsystem.services.prodcon import Producer, event
+from torchsystem.checkpoints.state import flatten, unflatten
+from torchsystem.checkpoints.store import Store
+
+@event
+class Checkpointed:
+    """
+    A checkpoint was written to the STORE.
+
+    Attributes:
+        key (str): The hash of the object the checkpoint belongs to.
+        tag (str): The tag of the checkpoint.
+        path (str): The path of the manifest of the checkpoint.
+        duration (float): The time in seconds spent writing the checkpoint in the background.
+    """
+    key: str
+    tag: str
+    path: str
+    duration: float
+
+@event
+class CheckpointFailed:
+    """
+    A checkpoint couldn't be written to the STORE.
+
+    Attributes:
+        key (str): The hash of the object the checkpoint belongs to.
+        tag (str): The tag of the checkpoint.
+        exception (Exception): The exception raised while writing the checkpoint.
+    """
+    key: str
+    tag: str
+    exception: Exception
+
+class Checkpointer:
+    """
+    A CHECKPOINTER saves checkpoints to a `Store` in the background, so training only stops for the time
+    needed to copy the state in memory instead of the time needed to serialize it and write it to disk.
+
+    Saving a checkpoint copies its tensors into CPU buffers that are allocated once and reused, pinned when
+    the tensors live in a GPU. There are two sets of buffers: while one is being written in the background,
+    the next snapshot is copied into the other, and at most one write is in flight, so saving waits for the
+    previous write only after the new snapshot was taken. When a write completes, a `Checkpointed` or a
+    `CheckpointFailed` event is dispatched through the PRODUCER, from the background thread.
+
+    Args:
+        store (Store): The STORE where the checkpoints are written.
+        producer (Producer, optional): The PRODUCER dispatching the completion events. Defaults to None.
+
+    Example:
+        ```python
+        from torchsystem.checkpoints import Store, Checkpointer
+        from torchsystem.checkpoints.background import Checkpointed
+
+        producer = Producer()
+        checkpointer = Checkpointer(Store('data/checkpoints'), producer)
+
+        @consumer.handler
+        def persist_model(event: Trained):
+            checkpointer.save(event.model.nn, {
+                'epoch': event.model.epoch,
+                'nn': event.model.nn.state_dict(),
+                'optimizer': event.model.optimizer.state_dict()
+            }, tag=f'epoch-{event.model.epoch}')
+
+        @consumer.handler
+        def on_checkpointed(event: Checkpointed):
+            print(f"Saved checkpoint {event.tag} in {event.duration:.2f}s")
+        ...
+        checkpointer.close()
+        ```
+    """
+    def __init__(self, store: Store, producer: Producer | None = None):
+        self.store = store
+        self.producer = producer
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.buffers = (dict[str, Tensor](), dict[str, Tensor]())
+        self.current = 0
+        self.future: Future | None = None
+
+    def copy(self, key: str, tensor: Tensor) -> Tensor:
+        buffers = self.buffers[self.current]
+        buffer = buffers.get(key)
+        if buffer is None or buffer.shape != tensor.shape or buffer.dtype != tensor.dtype:
+            buffer = buffers[key] = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=tensor.is_cuda)
+        buffer.copy_(tensor.detach(), non_blocking=tensor.is_cuda)
+        return buffer
+
+    def snapshot(self, state: Any) -> Any:
+        """
+        Copies the tensors of a state into the current set of buffers.
+
+        Args:
+            state (Any): The state, for example a `state_dict` or a dictionary of them.
+
+        Returns:
+            Any: The copy of the state.
+        """
+        skeleton, tensors = flatten(state)
+        copies = {key: self.copy(key, tensor) for key, tensor in tensors.items()}
+        if any(tensor.is_cuda for tensor in tensors.values()):
+            torch.cuda.synchronize()
+        return unflatten(skeleton, copies)
+
+    def save(self, obj: object | str, state: Any, tag: str = 'latest') -> Future:
+        """
+        Takes a snapshot of a state and writes it to the STORE in the background.
+
+        Args:
+            obj (object | str): The registered object the checkpoint belongs to, or its hash.
+            state (Any): The state to save.
+            tag (str, optional): The tag of the checkpoint. Defaults to 'latest'.
+
+        Returns:
+            Future: The future path of the manifest of the checkpoint.
+        """
+        key = self.store.key(obj)
+        snapshot = self.snapshot(state)
+        self.wait()
+        self.future = self.executor.submit(self.write, obj, key, snapshot, tag)
+        self.current = 1 - self.current
+        return self.future
+
+    def write(self, obj: object | str, key: str, snapshot: Any, tag: str) -> str:
+        start = perf_counter()
+        try:
+            path = self.store.save(obj, snapshot, tag)
+        except Exception as exception:
+            if self.producer is not None:
+                self.producer.dispatch(CheckpointFailed(key, tag, exception))
+            raise
+        if self.producer is not None:
+            self.producer.dispatch(Checkpointed(key, tag, path, perf_counter() - start))
+        return path
+
+    def wait(self):
+        """
+        Waits for the write in flight, if any. Exceptions raised while writing are not raised here,
+        they are set in the futures returned by `save` and dispatched as `CheckpointFailed` events.
+        """
+        if self.future is not None:
+            self.future.exception()
+
+    def close(self):
+        """
+        Waits for the write in flight and stops the background thread.
+        """
+        self.wait()
+        self.executor.shutdown()
@@ -0,0 +1,318 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from os import replace, remove, fsync, getpid, cpu_count
+from json import dumps, loads
+from math import prod
+from struct import Struct, error as StructError
+from typing import Any
+from itertools import accumulate
+from threading import Lock, get_ident
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import torch
+from torch import Tensor
+from torch.nn import Module
+
+from torchsystem.registry.accessors import optional
+from torchsystem.checkpoints.state import flatten, unflatten, getdtype, tobytes
+
+zstandard: Any = optional('zstandard')
+lz4: Any = optional('lz4.frame')
+
+MAGIC = b'TSCK'
+VERSION = 1
+HEADER = Struct('<4sH')
+FOOTER = Struct('<Q4s')
+
+def identity(data: bytes | memoryview) -> bytes | memoryview:
+    return data
+
+compressors: dict[str, Callable[[memoryview], bytes]] = {'raw': identity}
+decompressors: dict[str, Callable[[bytes, int], bytes]] = {'raw': lambda data, size: data}
+
+if zstandard is not None:
+    compressors['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+    decompressors['zstd'] = lambda data, size: zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+
+if lz4 is not None:
+    compressors['lz4'] = lambda data: lz4.compress(data)
+    decompressors['lz4'] = lambda data, size: lz4.decompress(data)
+
+def default() -> str:
+    """
+    Returns the best available compression: 'zstd' if `zstandard` is installed, 'lz4' if `lz4` is installed
+    and 'raw' otherwise.
+    """
+    return next(name for name in ('zstd', 'lz4', 'raw') if name in compressors)
+
+def save(
+    path: str,
+    state: Any,
+    compression: str | None = None,
+    chunksize: int = 4 << 20,
+    workers: int | None = None,
+    sync: bool = False
+):
+    """
+    Saves a state in the chunked checkpoint format. Tensors are split in chunks that are compressed in parallel
+    threads and written one after the other, followed by an index with the offsets, dtypes and shapes of the
+    tensors and the rest of the state. The file is written atomically.
+
+    Args:
+        path (str): The path of the file.
+        state (Any): The state, for example a `state_dict` or a dictionary of them.
+        compression (str, optional): The compression of the chunks, 'zstd', 'lz4' or 'raw'. Defaults to the best available.
+        chunksize (int, optional): The maximum size in bytes of the chunks. Defaults to 4 MiB.
+        workers (int, optional): The number of compression threads. Defaults to the executor's default.
+        sync (bool, optional): Whether to flush the file to disk before renaming it. Defaults to False.
+
+    Raises:
+        KeyError: If the compression is not available.
+
+    Example:
+        ```python
+        from torchsystem.checkpoints import chunked
+
+        chunked.save('data/weights/model.tsc', {'nn': model.state_dict(), 'optimizer': optimizer.state_dict()})
+        ```
+    """
+    skeleton, tensors = flatten(state)
+    write(path, skeleton, tensors, compression, chunksize, workers, sync)
+
+def split(tensors: dict[str, Tensor], chunksize: int) -> Iterator[tuple[str, memoryview]]:
+    for key, tensor in tensors.items():
+        view = tobytes(tensor)
+        for start in range(0, len(view), chunksize):
+            yield key, view[start:start + chunksize]
+
+def write(
+    path: str,
+    skeleton: Any,
+    tensors: dict[str, Tensor],
+    compression: str | None = None,
+    chunksize: int = 4 << 20,
+    workers: int | None = None,
+    sync: bool = False
+):
+    """
+    Writes a state in the chunked checkpoint format from its skeleton and its tensors, as returned by `flatten`.
+    The skeleton may reference tensors that are not written, for example the ones that didn't change since
+    a previous checkpoint. See `save`.
+
+    Tensors are copied to CPU memory one at a time, and at most twice as many chunks as workers are compressed
+    or waiting to be written at once, so writing a checkpoint of tensors living in a GPU doesn't need a copy of
+    the whole state in CPU memory.
+    """
+    compression = compression or default()
+    compress = compressors[compression]
+    index: dict[str, dict[str, Any]] = {key: {'dtype': str(tensor.dtype), 'shape': list(tensor.shape), 'chunks': []} for key, tensor in tensors.items()}
+    workers = workers or min(32, (cpu_count() or 1) + 4)
+    temporary = f'{path}.{getpid()}-{get_ident()}.tmp'
+    try:
+        with ThreadPoolExecutor(workers) as executor, open(temporary, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION))
+            inflight = deque[tuple[str, int, Future]]()
+            def drain(limit: int):
+                while len(inflight) > limit:
+                    key, size, future = inflight.popleft()
+                    data = future.result()
+                    index[key]['chunks'].append([file.tell(), len(data), size])
+                    file.write(data)
+            try:
+                for key, piece in split(tensors, chunksize):
+                    inflight.append((key, len(piece), executor.submit(compress, piece)))
+                    drain(2 * workers)
+                drain(0)
+            finally:
+                for _, _, future in inflight:
+                    future.cancel()
+            header = dumps({'compression': compression, 'state': skeleton, 'tensors': index}).encode()
+            file.write(header)
+            file.write(FOOTER.pack(len(header), MAGIC))
+            if sync:
+                file.flush()
+                fsync(file.fileno())
+        replace(temporary, path)
+    except BaseException:
+        try:
+            remove(temporary)
+        except FileNotFoundError:
+            pass
+        raise
+
+class Reader:
+    """
+    A READER of checkpoints in the chunked format written by `save`. Only the index is read when the READER
+    is created, and tensors are read and decompressed lazily, one at a time, with their chunks decompressed
+    in parallel threads. This makes it cheap to load part of a checkpoint, like the encoder of a big model,
+    or to stream the tensors of a checkpoint into a module without holding the whole checkpoint in memory.
+
+    Args:
+        path (str): The path of the file.
+        workers (int, optional): The number of decompression threads. Defaults to the executor's default.
+
+    Raises:
+        ValueError: If the file is not a checkpoint in the chunked format.
+
+    Example:
+        ```python
+        from torchsystem.checkpoints.chunked import Reader
+
+        with Reader('data/weights/model.tsc') as reader:
+            print(reader.keys()) # ['nn.encoder.weight', ..., 'optimizer.state.0.exp_avg', ...]
+            encoder.load_state_dict(reader.tensors('nn.encoder.'))
+            reader.load_state_dict(model, 'nn.')
+            checkpoint = reader.load() # The whole state.
+        ```
+    """
+    def __init__(self, path: str, workers: int | None = None):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            magic, version = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f'The file {path} is not a checkpoint')
+            if version > VERSION:
+                raise ValueError(f'The checkpoint {path} has version {version}, expected at most {VERSION}')
+            self.file.seek(-FOOTER.size, 2)
+            length, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+            if magic != MAGIC:
+                raise ValueError(f'The checkpoint {path} is truncated')
+            self.file.seek(-FOOTER.size - length, 2)
+            header = loads(self.file.read(length))
+            self.compression = header['compression']
+            self.decompress = decompressors[self.compression]
+            self.state = header['state']
+            self.index = header['tensors']
+        except StructError as error:
+            self.file.close()
+            raise ValueError(f'The checkpoint {path} is truncated') from error
+        except BaseException:
+            self.file.close()
+            raise
+        self.executor = ThreadPoolExecutor(workers)
+        self.lock = Lock()
+
+    def keys(self) -> list[str]:
+        """
+        Returns the paths of the tensors in the checkpoint.
+        """
+        return list(self.index.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __getitem__(self, key: str) -> Tensor:
+        """
+        Reads a tensor of the checkpoint by its path.
+
+        Args:
+            key (str): The path of the tensor.
+
+        Raises:
+            KeyError: If the tensor is not in the checkpoint.
+
+        Returns:
+            Tensor: The tensor.
+        """
+        entry = self.index[key]
+        dtype, shape, chunks = getdtype(entry['dtype']), entry['shape'], entry['chunks']
+        size = prod(shape) * dtype.itemsize
+        if not size:
+            return torch.empty(shape, dtype=dtype)
+        start = chunks[0][0]
+        data = bytearray(chunks[-1][0] + chunks[-1][1] - start)
+        with self.lock:
+            self.file.seek(start)
+            self.file.readinto(data)
+        if self.compression == 'raw':
+            return torch.frombuffer(data, dtype=torch.uint8).view(dtype).reshape(shape)
+        output = bytearray(size)
+        view, source = memoryview(output), memoryview(data)
+        def decompress(chunk: tuple[int, int, int], position: int):
+            offset, length, raw = chunk
+            view[position:position + raw] = self.decompress(source[offset - start:offset - start + length], raw)
+        list(self.executor.map(decompress, chunks, accumulate((chunk[2] for chunk in chunks[:-1]), initial=0)))
+        return torch.frombuffer(output, dtype=torch.uint8).view(dtype).reshape(shape)
+
+    def stream(self, prefix: str = '') -> Iterator[tuple[str, Tensor]]:
+        """
+        Reads the tensors whose path starts with a prefix one at a time.
+
+        Args:
+            prefix (str, optional): The prefix of the paths. Defaults to '', all the tensors.
+
+        Yields:
+            tuple[str, Tensor]: The paths without the prefix and the tensors.
+        """
+        for key in self.index:
+            if key.startswith(prefix):
+                yield key.removeprefix(prefix), self[key]
+
+    def tensors(self, prefix: str = '') -> dict[str, Tensor]:
+        """
+        Reads the tensors whose path starts with a prefix, for example to load a `state_dict`.
+
+        Args:
+            prefix (str, optional): The prefix of the paths. Defaults to '', all the tensors.
+
+        Returns:
+            dict[str, Tensor]: The tensors keyed by their paths without the prefix.
+        """
+        return dict(self.stream(prefix))
+
+    def load(self) -> Any:
+        """
+        Reads the whole state.
+
+        Returns:
+            Any: The saved state.
+        """
+        return unflatten(self.state, self.__getitem__)
+
+    def load_state_dict(self, module: Module, prefix: str = '', strict: bool = True):
+        """
+        Streams the tensors whose path starts with a prefix into the state of a module, copying them one
+        at a time into the existing parameters and buffers, so the memory used is bounded by the largest
+        tensor.
+
+        Args:
+            module (Module): The module.
+            prefix (str, optional): The prefix of the paths of the state of the module. Defaults to ''.
+            strict (bool, optional): Whether the keys must match the keys of the module's state. Defaults to True.
+
+        Raises:
+            KeyError: If strict and the keys don't match.
+        """
+        state = module.state_dict(keep_vars=True)
+        keys = {key.removeprefix(prefix) for key in self.index if key.startswith(prefix)}
+        if strict and keys != state.keys():
+            missing, unexpected = state.keys() - keys, keys - state.keys()
+            raise KeyError(f'Missing keys {sorted(missing)} and unexpected keys {sorted(unexpected)} in the checkpoint')
+        with torch.no_grad():
+            for key, tensor in self.stream(prefix):
+                if key in state:
+                    state[key].copy_(tensor)
+
+    def close(self):
+        self.file.close()
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'Reader':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,144 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from os import path, makedirs, remove
+from json import dumps, loads
+from typing import Any
+from hashlib import blake2b
+
+from torch import Tensor
+
+from torchsystem.checkpoints.state import flatten, unflatten, tobytes
+from torchsystem.checkpoints.store import write
+from torchsystem.checkpoints import chunked
+from torchsystem.checkpoints.chunked import Reader
+
+def sample(tensor: Tensor, samples: int) -> bytes:
+    """
+    Returns a digest of a strided sample of the elements of a tensor, used as a cheap check of
+    whether it changed.
+    """
+    flat = tensor.detach().reshape(-1)
+    if flat.numel() > samples:
+        flat = flat[::flat.numel() // samples][:samples]
+    return blake2b(tobytes(flat), digest_size=8).digest()
+
+class Deltas:
+    """
+    A chain of incremental checkpoints. The first checkpoint is a full base, and each of the following ones
+    only contains the tensors that changed since the previous one, which makes checkpointing cheap when most
+    of the parameters are frozen, as in fine-tuning. Every given number of checkpoints the chain is compacted
+    into a new full base and the older files are removed.
+
+    A tensor is considered unchanged when it is the same tensor as in the previous checkpoint, its version
+    counter, which PyTorch increments on in-place operations like optimizer steps, didn't change, and a digest
+    of a strided sample of its elements is the same. Tensors are not hashed entirely.
+
+    Checkpoints are written in the chunked format (see `torchsystem.checkpoints.chunked`) and the chain is
+    described by a small JSON file updated atomically after each checkpoint. Restoring reads only the indexes
+    of the files of the chain and loads each tensor from the newest file containing it.
+
+    Args:
+        directory (str): The directory of the chain.
+        every (int, optional): The number of checkpoints between full bases. Defaults to 10.
+        samples (int, optional): The number of elements sampled per tensor to detect changes. Defaults to 64.
+        compression (str, optional): The compression of the files. Defaults to the best available.
+
+    Example:
+        ```python
+        from torchsystem.checkpoints.delta import Deltas
+
+        deltas = Deltas(f'data/checkpoints/{model.hash}', every=20)
+
+        @consumer.handler
+        def persist_model(event: Trained):
+            deltas.save({
+                'epoch': event.model.epoch,
+                'nn': event.model.nn.state_dict(),
+                'optimizer': event.model.optimizer.state_dict()
+            })
+        ...
+        checkpoint = deltas.load()
+        ```
+    """
+    def __init__(self, directory: str, every: int = 10, samples: int = 64, compression: str | None = None):
+        self.directory = directory
+        self.every = every
+        self.samples = samples
+        self.compression = compression
+        self.versions = dict[str, tuple[int, int, bytes]]()
+        makedirs(directory, exist_ok=True)
+
+    @property
+    def files(self) -> list[str]:
+        """
+        The files of the chain, from its base to its newest checkpoint.
+        """
+        filepath = path.join(self.directory, 'chain.json')
+        if not path.exists(filepath):
+            return []
+        with open(filepath) as file:
+            return loads(file.read())['files']
+
+    def track(self, tensor: Tensor) -> tuple[int, int, bytes]:
+        return (tensor._version, tensor.data_ptr(), sample(tensor, self.samples))
+
+    def save(self, state: Any) -> str:
+        """
+        Saves a checkpoint with the tensors of the state that changed since the previous checkpoint, or
+        a full base if it's the first checkpoint saved by this object or the chain must be compacted.
+
+        Args:
+            state (Any): The state, for example a `state_dict` or a dictionary of them.
+
+        Returns:
+            str: The path of the written file.
+        """
+        skeleton, tensors = flatten(state)
+        versions = {key: self.track(tensor) for key, tensor in tensors.items()}
+        files = self.files
+        base = not self.versions or len(files) >= self.every
+        if not base:
+            tensors = {key: tensor for key, tensor in tensors.items() if self.versions.get(key) != versions[key]}
+        number = int(files[-1].split('-')[1].split('.')[0]) + 1 if files else 0
+        name = f"{'base' if base else 'delta'}-{number:06d}.tsc"
+        chunked.write(path.join(self.directory, name), skeleton, tensors, self.compression)
+        write(path.join(self.directory, 'chain.json'), dumps({'files': [name] if base else files + [name]}).encode())
+        if base:
+            for previous in files:
+                remove(path.join(self.directory, previous))
+        self.versions = versions
+        return path.join(self.directory, name)
+
+    def load(self) -> Any:
+        """
+        Restores the state of the newest checkpoint of the chain.
+
+        Raises:
+            FileNotFoundError: If there are no checkpoints.
+
+        Returns:
+            Any: The saved state.
+        """
+        files = self.files
+        if not files:
+            raise FileNotFoundError(f'There are no checkpoints in {self.directory}')
+        readers = [Reader(path.join(self.directory, name)) for name in files]
+        try:
+            owners = {}
+            for reader in readers:
+                owners.update(dict.fromkeys(reader.keys(), reader))
+            return unflatten(readers[-1].state, lambda key: owners[key][key])
+        finally:
+            for reader in readers:
+                reader.close()
@@ -0,0 +1,113 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from typing import Any
+from collections.abc import Callable, Mapping
+
+import torch
+from torch import Tensor
+
+def join(path: str, key: Any) -> str:
+    return f'{path}.{key}' if path else str(key)
+
+def flatten(state: Any) -> tuple[Any, dict[str, Tensor]]:
+    """
+    Splits a state, such as the `state_dict` of a module or an optimizer or a dictionary of them, into a JSON
+    serializable skeleton and a flat dictionary of its tensors keyed by their dotted path. Tensors are replaced
+    in the skeleton by references to their path. Dictionaries with keys that are not strings and tuples are
+    encoded so they are restored as they were.
+
+    Args:
+        state (Any): The state to flatten.
+
+    Raises:
+        TypeError: If the state contains values that are not tensors, containers or JSON scalars.
+
+    Returns:
+        tuple[Any, dict[str, Tensor]]: The skeleton and the tensors of the state.
+
+    Example:
+        ```python
+        skeleton, tensors = flatten({'nn': model.state_dict(), 'optimizer': optimizer.state_dict(), 'epoch': 3})
+        print(tensors.keys()) # ['nn.layer.weight', 'nn.layer.bias', 'optimizer.state.0.exp_avg', ...]
+        ```
+    """
+    tensors = dict[str, Tensor]()
+    def visit(value: Any, path: str) -> Any:
+        if isinstance(value, Tensor):
+            tensors[path] = value
+            return {'__tensor__': path}
+        if isinstance(value, Mapping):
+            if all(isinstance(key, str) for key in value):
+                return {key: visit(item, join(path, key)) for key, item in value.items()}
+            return {'__items__': [[key, visit(item, join(path, key))] for key, item in value.items()]}
+        if isinstance(value, tuple):
+            return {'__tuple__': [visit(item, join(path, index)) for index, item in enumerate(value)]}
+        if isinstance(value, list):
+            return [visit(item, join(path, index)) for index, item in enumerate(value)]
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, torch.dtype):
+            return {'__dtype__': str(value)}
+        raise TypeError(f'Cannot store a value of type {type(value).__name__} in a checkpoint')
+    return visit(state, ''), tensors
+
+def unflatten(skeleton: Any, tensors: Mapping[str, Tensor] | Callable[[str], Tensor]) -> Any:
+    """
+    Rebuilds a state from its skeleton and its tensors. The inverse of `flatten`.
+
+    Args:
+        skeleton (Any): The skeleton of the state.
+        tensors (Mapping[str, Tensor] | Callable[[str], Tensor]): The tensors of the state or a function loading them by path.
+
+    Returns:
+        Any: The state.
+    """
+    load = tensors.__getitem__ if isinstance(tensors, Mapping) else tensors
+    def visit(value: Any) -> Any:
+        if isinstance(value, dict):
+            if '__tensor__' in value:
+                return load(value['__tensor__'])
+            if '__items__' in value:
+                return {key: visit(item) for key, item in value['__items__']}
+            if '__tuple__' in value:
+                return tuple(visit(item) for item in value['__tuple__'])
+            if '__dtype__' in value:
+                return getdtype(value['__dtype__'])
+            return {key: visit(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [visit(item) for item in value]
+        return value
+    return visit(skeleton)
+
+def getdtype(name: str) -> torch.dtype:
+    dtype = getattr(torch, name.removeprefix('torch.'), None)
+    if not isinstance(dtype, torch.dtype):
+        raise ValueError(f'Unknown dtype {name}')
+    return dtype
+
+def tobytes(tensor: Tensor) -> memoryview:
+    """
+    Returns a view of the raw bytes of a tensor in CPU memory, copying it only if it lives in another
+    device or is not contiguous.
+    """
+    tensor = tensor.detach().cpu().contiguous()
+    return memoryview(tensor.reshape(-1).view(torch.uint8).numpy())
+
+def frombytes(data: bytes | bytearray | memoryview, dtype: torch.dtype, shape: list[int]) -> Tensor:
+    """
+    Builds a tensor from raw bytes, as returned by `tobytes`. The tensor shares the memory of writable buffers.
+    """
+    if not len(data):
+        return torch.empty(shape, dtype=dtype)
+    return torch.frombuffer(data, dtype=torch.uint8).view(dtype).reshape(shape)
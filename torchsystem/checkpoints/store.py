@@ -0,0 +1,241 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from os import path, makedirs, listdir, remove, replace, fsync, walk, getpid
+from json import dumps, loads
+from math import prod
+from typing import Any
+from threading import get_ident
+
+import torch
+from torch import Tensor
+
+from torchsystem.registry import gethash
+from torchsystem.registry.accessors import algorithms
+from torchsystem.registry.index import Index
+from torchsystem.checkpoints.state import flatten, unflatten, getdtype, tobytes
+
+def write(filepath: str, data: bytes | memoryview, sync: bool = False):
+    """
+    Atomically writes data to a file, writing a temporary file first and renaming it.
+
+    Args:
+        filepath (str): The path of the file.
+        data (bytes | memoryview): The data to write.
+        sync (bool, optional): Whether to flush the data to disk before renaming the file. Defaults to False.
+    """
+    temporary = f'{filepath}.{getpid()}-{get_ident()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(data)
+        if sync:
+            file.flush()
+            fsync(file.fileno())
+    replace(temporary, filepath)
+
+class Store:
+    """
+    A content-addressed checkpoint STORE. Checkpoints are keyed by the hash of the object they belong to (see
+    `torchsystem.registry.gethash`) and a tag, such as the epoch or 'latest'.
+
+    Each tensor of a checkpoint is written as a separate object named by a digest of its content, so tensors
+    that didn't change, like frozen layers or embeddings that are not fine-tuned, or that are shared between
+    models, are written and stored only once. The rest of the state (epochs, hyperparameters of optimizers)
+    is kept in a small JSON manifest next to the references to the tensors. Objects and manifests are written
+    atomically, and tensors are read as memory-mapped files, so loading a checkpoint doesn't read the tensors
+    that are not used.
+
+    Args:
+        root (str): The directory of the STORE.
+        algorithm (str, optional): The hashing algorithm used to address the tensors, from `torchsystem.registry.accessors.algorithms`. Defaults to 'blake2b'.
+        sync (bool, optional): Whether to flush each written file to disk. Defaults to False.
+        index (Index, optional): An index where the manifests are attached to the hashes of their objects. Defaults to None.
+
+    Example:
+        ```python
+        from torchsystem.checkpoints import Store
+
+        store = Store('data/checkpoints')
+
+        @consumer.handler
+        def persist_model(event: Trained):
+            store.save(event.model.nn, {
+                'epoch': event.model.epoch,
+                'nn': event.model.nn.state_dict(),
+                'optimizer': event.model.optimizer.state_dict()
+            }, tag=f'epoch-{event.model.epoch}')
+        ...
+        checkpoint = store.load(model.nn, 'epoch-10')
+        model.nn.load_state_dict(checkpoint['nn'])
+        ```
+    """
+    def __init__(self, root: str, algorithm: str = 'blake2b', sync: bool = False, index: Index | None = None):
+        self.root = root
+        self.algorithm = algorithm
+        self.digest = algorithms[algorithm]
+        self.sync = sync
+        self.index = index
+        makedirs(path.join(root, 'objects'), exist_ok=True)
+        makedirs(path.join(root, 'manifests'), exist_ok=True)
+
+    def key(self, obj: object | str) -> str:
+        return obj if isinstance(obj, str) else gethash(obj)
+
+    def manifest(self, obj: object | str, tag: str) -> str:
+        """
+        Returns the path of the manifest of a checkpoint.
+
+        Args:
+            obj (object | str): The registered object or its hash.
+            tag (str): The tag of the checkpoint.
+
+        Returns:
+            str: The path of the manifest.
+        """
+        return path.join(self.root, 'manifests', self.key(obj), f'{tag}.json')
+
+    def locate(self, digest: str) -> str:
+        return path.join(self.root, 'objects', digest[:2], digest[2:])
+
+    def put(self, tensor: Tensor) -> dict[str, Any]:
+        """
+        Writes a tensor as an object of the STORE if no object with the same content exists.
+
+        Args:
+            tensor (Tensor): The tensor.
+
+        Returns:
+            dict[str, Any]: The reference to the object with its digest, dtype and shape.
+        """
+        data = tobytes(tensor)
+        digest = self.digest(data)
+        filepath = self.locate(digest)
+        if not path.exists(filepath):
+            makedirs(path.dirname(filepath), exist_ok=True)
+            write(filepath, data, self.sync)
+        return {'object': digest, 'dtype': str(tensor.dtype), 'shape': list(tensor.shape)}
+
+    def get(self, reference: dict[str, Any], mmap: bool = True) -> Tensor:
+        """
+        Reads a tensor from its reference.
+
+        Args:
+            reference (dict[str, Any]): The reference to the object.
+            mmap (bool, optional): Whether to memory-map the object instead of reading it. Defaults to True.
+
+        Returns:
+            Tensor: The tensor.
+        """
+        dtype, shape = getdtype(reference['dtype']), reference['shape']
+        size = prod(shape) * dtype.itemsize
+        if not size:
+            return torch.empty(shape, dtype=dtype)
+        filepath = self.locate(reference['object'])
+        if mmap:
+            return torch.from_file(filepath, shared=False, size=size, dtype=torch.uint8).view(dtype).reshape(shape)
+        with open(filepath, 'rb') as file:
+            data = bytearray(size)
+            file.readinto(data)
+        return torch.frombuffer(data, dtype=torch.uint8).view(dtype).reshape(shape)
+
+    def save(self, obj: object | str, state: Any, tag: str = 'latest') -> str:
+        """
+        Saves a checkpoint, writing only the tensors whose content is not stored yet.
+
+        Args:
+            obj (object | str): The registered object the checkpoint belongs to, or its hash.
+            state (Any): The state to save, for example a `state_dict` or a dictionary of them.
+            tag (str, optional): The tag of the checkpoint. Defaults to 'latest'.
+
+        Returns:
+            str: The path of the manifest of the checkpoint.
+        """
+        skeleton, tensors = flatten(state)
+        references = {key: self.put(tensor) for key, tensor in tensors.items()}
+        filepath = self.manifest(obj, tag)
+        makedirs(path.dirname(filepath), exist_ok=True)
+        write(filepath, dumps({'state': skeleton, 'tensors': references}).encode(), self.sync)
+        if self.index is not None:
+            if isinstance(obj, str):
+                self.index.attach(obj, filepath)
+            else:
+                self.index.add(obj, filepath)
+        return filepath
+
+    def load(self, obj: object | str, tag: str = 'latest', mmap: bool = True) -> Any:
+        """
+        Loads a checkpoint.
+
+        Args:
+            obj (object | str): The registered object the checkpoint belongs to, or its hash.
+            tag (str, optional): The tag of the checkpoint. Defaults to 'latest'.
+            mmap (bool, optional): Whether to memory-map the tensors instead of reading them. Defaults to True.
+
+        Raises:
+            FileNotFoundError: If the checkpoint doesn't exist.
+
+        Returns:
+            Any: The saved state.
+        """
+        with open(self.manifest(obj, tag)) as file:
+            manifest = loads(file.read())
+        references = manifest['tensors']
+        return unflatten(manifest['state'], lambda key: self.get(references[key], mmap))
+
+    def exists(self, obj: object | str, tag: str = 'latest') -> bool:
+        return path.exists(self.manifest(obj, tag))
+
+    def tags(self, obj: object | str) -> list[str]:
+        """
+        Returns the tags of the checkpoints of an object.
+
+        Args:
+            obj (object | str): The registered object or its hash.
+
+        Returns:
+            list[str]: The tags of the checkpoints.
+        """
+        directory = path.join(self.root, 'manifests', self.key(obj))
+        if not path.isdir(directory):
+            return []
+        return sorted(name.removesuffix('.json') for name in listdir(directory) if name.endswith('.json'))
+
+    def delete(self, obj: object | str, tag: str):
+        """
+        Deletes a checkpoint. Its objects are removed by `collect` if no other checkpoint uses them.
+
+        Args:
+            obj (object | str): The registered object or its hash.
+            tag (str): The tag of the checkpoint.
+        """
+        remove(self.manifest(obj, tag))
+
+    def collect(self) -> int:
+        """
+        Removes the objects that are not used by any checkpoint. Should not run while checkpoints are being saved.
+
+        Returns:
+            int: The number of removed objects.
+        """
+        used = set[str]()
+        for directory, _, names in walk(path.join(self.root, 'manifests')):
+            for name in names:
+                if name.endswith('.json'):
+                    with open(path.join(directory, name)) as file:
+                        used.update(reference['object'] for reference in loads(file.read())['tensors'].values())
+        removed = 0
+        for directory, _, names in walk(path.join(self.root, 'objects')):
+            for name in names:
+                if path.basename(directory) + name not in used:
+                    remove(path.join(directory, name))
+                    removed += 1
+        return removed
@@ -15,7 +15,7 @@
 ### While this is workings, this should be refactored with better code before it grows too much.
 
 from typing import Generator
-from inspect import signature
+from inspect import signature, iscoroutinefunction
 from contextlib import ExitStack, contextmanager
 from collections.abc import Callable
 from functools import wraps
@@ -66,6 +66,14 @@ def Depends(callable: Callable):
 
 def inject(provider: Provider):
     def decorator(function: Callable):
+        if iscoroutinefunction(function):
+            @wraps(function)
+            async def coroutine(*args, **kwargs):
+                bounded, exit_stack = resolve(function, provider, *args, **kwargs)
+                with exit_stack:
+                    return await function(*bounded.args, **bounded.kwargs)
+            return coroutine
+        
         @wraps(function)
         def wrapper(*args, **kwargs):
             bounded, exit_stack = resolve(function, provider, *args, **kwargs)
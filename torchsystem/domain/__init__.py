@@ -1,3 +1,4 @@
 from torchsystem.domain.aggregate import Aggregate as Aggregate
 from torchsystem.domain.events import Events as Events
-from torchsystem.domain.events import Event as Event
\ No newline at end of file
+from torchsystem.domain.events import Event as Event
+from torchsystem.domain.aggregate import phased as phased
\ No newline at end of file
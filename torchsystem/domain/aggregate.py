@@ -19,9 +19,52 @@
 from abc import ABC
 from typing import Any
 from typing import Literal
+from types import MappingProxyType
+from functools import wraps
+from contextlib import contextmanager, ExitStack
+from collections.abc import Callable, Iterator, Mapping
+from collections.abc import Set as AbstractSet
+from torch import dtype
+from torch import autocast
+from torch import inference_mode
 from torch.nn import Module 
+from torchsystem.domain.events import Events
 
 type Phase = Literal['train', 'evaluation'] | str
+type Boundary = Literal['step', 'epoch', 'phase']
+
+class Epoch:
+    """
+    A descriptor for the epoch of an AGGREGATE. The first assignment sets the epoch, and the following ones
+    call the `onepoch` hook and mark the 'epoch' boundary of the domain events. Tracking the epoch with a
+    descriptor keeps the hook and the boundary out of assignments to any other attribute of the AGGREGATE.
+    An epoch registered as a buffer is stored with `Module.__setattr__` in the buffers of the module, so
+    it's saved in its state dict and the hook is still called when it's assigned.
+    """
+    def __get__(self, obj: Any, owner: type | None = None) -> Any:
+        if obj is None:
+            return self
+        if 'epoch' in obj.__dict__:
+            return obj.__dict__['epoch']
+        buffers = obj.__dict__.get('_buffers')
+        if buffers is not None and 'epoch' in buffers:
+            return buffers['epoch']
+        raise AttributeError(f"'{type(obj).__name__}' object has no attribute 'epoch'")
+
+    def __set__(self, obj: Any, value: Any):
+        buffers = obj.__dict__.get('_buffers')
+        if buffers is not None and 'epoch' in buffers:
+            Module.__setattr__(obj, 'epoch', value)
+            initialized = True
+        else:
+            initialized = 'epoch' in obj.__dict__
+            obj.__dict__['epoch'] = value
+        if initialized:
+            obj.onepoch()
+            obj.commit('epoch')
+
+    def __delete__(self, obj: Any):
+        obj.__dict__.pop('epoch', None)
 
 class Aggregate(Module, ABC):
     """
@@ -37,12 +80,27 @@ class Aggregate(Module, ABC):
     it needs to be part of an AGGREGATE that includes other components like a tokenizer. The AGGREGATE
     is responsible for coordinating the interactions between these components.
 
+    The AGGREGATE owns a queue of domain EVENTS. Domain methods enqueue events cheaply, and the queue
+    is committed at the boundaries listed in the `boundaries` class attribute: when the epoch changes,
+    when the phase changes, or every `every` steps, where steps are marked by calling `commit('step')`.
+    This keeps event handling out of the inner training loop.
+
     Attributes:
         id (Any): The id of the AGGREGATE ROOT. It should be unique within the AGGREGATE boundary.
+        epoch (Any): The epoch of the AGGREGATE. Assigning it after its first assignment calls the onepoch hook.
         phase (str): The phase of the AGGREGATE.
         events (Events): The domain events of the AGGREGATE.
+        boundaries (AbstractSet[Boundary]): The boundaries at which the events are committed. Defaults to {'epoch', 'phase'}.
+        every (int): The number of steps between commits when 'step' is a boundary. Defaults to 1.
+        precision (Mapping[str, dtype]): The dtypes used for autocast in each phase. Defaults to no autocast.
 
     Methods:
+        context:
+            A context manager and decorator running code with the autograd and autocast settings of a phase.
+
+        commit:
+            Commits the domain events, or marks a boundary at which they are committed if configured.
+
         onphase:
             A hook that is called when the phase changes. Implement this method to add custom behavior.
 
@@ -55,9 +113,17 @@ class Aggregate(Module, ABC):
         from torch.nn import Module
         from torch.optim import Optimizer
         from torchsystem import Aggregate
+        from torchsystem.domain import Event
         from torchsystem.registry import gethash
 
+        class Fitted(Event):
+            def __init__(self, loss: Tensor):
+                self.loss = loss
+
         class Classifier(Aggregate):
+            boundaries = {'step', 'epoch'}
+            every = 100
+
             def __init__(self, model: Module, criterion: Module, optimizer: Optimizer):
                 super().__init__()
                 self.epoch = 0
@@ -87,6 +153,8 @@ class Aggregate(Module, ABC):
                 loss = self.loss(output, target)
                 loss.backward()
                 self.optimizer.step()
+                self.events.enqueue(Fitted(loss.detach()))
+                self.commit('step') # Committed every 100 steps.
                 return output, loss
 
             def evaluate(self, input: Tensor, target: Tensor) -> tuple[Tensor, Tensor]: 
@@ -95,10 +163,22 @@ class Aggregate(Module, ABC):
                 return output, loss
         ```
     """
-    
+    boundaries: AbstractSet[Boundary] = frozenset({'epoch', 'phase'})
+    every: int = 1
+    precision: Mapping[str, dtype] = MappingProxyType({})
+    epoch = Epoch()
+
     def __init__(self):
         super().__init__()
         self.__id = None
+        self.__steps = 0
+        self.events = Events()
+
+    def __setattr__(self, name: str, value: Any):
+        if name == 'epoch':
+            object.__setattr__(self, name, value)
+        else:
+            super().__setattr__(name, value)
 
 
     @property
@@ -168,7 +248,7 @@ class Aggregate(Module, ABC):
 
 
     @property
-    def phase(self) -> Literal['train', 'evaluation']:
+    def phase(self) -> Phase:
         """
         The phase of the AGGREGATE. The phase is a property of neural networks that not only describes
         the current state of the network, but also determines how the network should behave. 
@@ -189,13 +269,87 @@ class Aggregate(Module, ABC):
         The phase will be set to 'train' if the value is 'train', otherwise it will be set to 'evaluation'.
         
         Changing the phase of the AGGREGATE will set all the modules in the AGGREGATE to the training or
-        evaluation mode respectively.
+        evaluation mode respectively. Setting the phase the AGGREGATE is already in does nothing, so modules
+        set to another mode individually keep it.
 
         Args:
             value (str): The phase of the AGGREGATE. It can be either 'train' or 'evaluation'.
         """
-        self.train() if value == 'train' else self.eval()
+        training = value == 'train'
+        if training == self.training:
+            return
+        self.train(training)
         self.onphase()
+        self.commit('phase')
+
+    @contextmanager
+    def context(self, phase: Phase | None = None) -> Iterator['Aggregate']:
+        """
+        A context manager, also usable as a decorator, that runs code with the execution settings of a phase.
+        Outside the training phase, code runs under `torch.inference_mode`, so no autograd state is recorded,
+        and if a dtype is configured for the phase in the `precision` class attribute, under `torch.autocast`
+        for the device of the parameters of the AGGREGATE. If a phase is given, the AGGREGATE is set to it and
+        the previous phase is restored on exit, also when the code raises. If the `onphase` hook or the commit of
+        the events fail while restoring the phase after an exception, the original exception is raised with the
+        failure as its cause, so it's not hidden by them.
+
+        Args:
+            phase (Phase, optional): The phase to run the code in. Defaults to None, the current phase.
+
+        Yields:
+            Aggregate: The AGGREGATE.
+
+        Example:
+            ```python
+            class Classifier(Aggregate):
+                precision = {'evaluation': torch.bfloat16}
+                ...
+
+            with model.context('evaluation'):
+                output, loss = model.evaluate(input, target) # bf16 autocast under inference mode.
+
+            @model.context('evaluation')
+            def predict(input: Tensor) -> Tensor:
+                return model(input)
+            ```
+        """
+        previous = self.phase
+        if phase is not None and phase != previous:
+            self.phase = phase
+        current = self.phase
+        try:
+            with ExitStack() as stack:
+                if current != 'train':
+                    stack.enter_context(inference_mode())
+                precision = self.precision.get(current)
+                if precision is not None:
+                    parameter = next(self.parameters(), None)
+                    stack.enter_context(autocast(parameter.device.type if parameter is not None else 'cpu', dtype=precision))
+                yield self
+        except BaseException as exception:
+            try:
+                self.phase = previous
+            except Exception as error:
+                raise exception from error
+            raise
+        self.phase = previous
+
+    def commit(self, boundary: Boundary | None = None):
+        """
+        Commits the domain events of the AGGREGATE. If a boundary is given, the events are only committed
+        if it's one of the configured boundaries, and for steps only every `every` steps.
+
+        Args:
+            boundary (Boundary, optional): The boundary reached. Defaults to None, which commits unconditionally.
+        """
+        if boundary is not None:
+            if boundary not in self.boundaries:
+                return
+            if boundary == 'step':
+                self.__steps += 1
+                if self.__steps % self.every:
+                    return
+        self.events.commit()
 
     def onphase(self):
         """
@@ -207,9 +361,34 @@ class Aggregate(Module, ABC):
         A hook that is called when the epoch changes. Implement this method to add custom behavior.
         """
 
-    def __setattr__(self, name, value):
-        if name == 'epoch' and hasattr(self, 'epoch'):
-            super().__setattr__(name, value)
-            self.onepoch()
-        else:        
-            super().__setattr__(name, value)
\ No newline at end of file
+
+def phased(phase: Phase) -> Callable[[Callable], Callable]:
+    """
+    A decorator for methods of an AGGREGATE that runs them in the context of a phase. See `Aggregate.context`.
+
+    Args:
+        phase (Phase): The phase to run the method in.
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+
+    Example:
+        ```python
+        from torchsystem.domain.aggregate import Aggregate, phased
+
+        class Classifier(Aggregate):
+            ...
+
+            @phased('evaluation')
+            def evaluate(self, input: Tensor, target: Tensor) -> tuple[Tensor, Tensor]:
+                output = self(input)
+                return output, self.loss(output, target)
+        ```
+    """
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self: Aggregate, *args, **kwargs):
+            with self.context(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
\ No newline at end of file
@@ -5,4 +5,5 @@ from torchsystem.registry.accessors import gethash as gethash
 from torchsystem.registry.accessors import getname as getname
 from torchsystem.registry.accessors import sethash as sethash
 from torchsystem.registry.accessors import setname as setname
-from torchsystem.registry.accessors import getmetadata as getmetadata
\ No newline at end of file
+from torchsystem.registry.accessors import getmetadata as getmetadata
+from torchsystem.registry.accessors import hasharguments as hasharguments
\ No newline at end of file
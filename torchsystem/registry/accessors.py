@@ -11,18 +11,34 @@
 #
 # For inquiries, visit: entropy-flux.github.io/TorchSystem/
 
-from typing import Any
-from json import dumps
-from hashlib import md5
+from os import path, replace
+from json import dumps, loads
+from threading import RLock
+from importlib import import_module
+from importlib.machinery import PathFinder
+from hashlib import md5, blake2b
 from copy import deepcopy
-from typing import overload
+from itertools import accumulate
+from types import ModuleType, UnionType
+from inspect import signature
+from typing import overload, Union, get_args, get_origin
 from typing import Optional
 from typing import Any
-from collections.abc import Callable 
+from collections.abc import Callable, Iterable
+from torch import Tensor, dtype, uint8
 from torch.nn import Module
 from torch.serialization import add_safe_globals
 from torchsystem.registry import core
 
+def optional(name: str) -> ModuleType | None:
+    try:
+        return import_module(name)
+    except ImportError:
+        return None
+
+xxhash = optional('xxhash')
+numpy = optional('numpy')
+
 def getarguments(obj: object) -> dict[str, Any]:
     """
     A function to get the arguments captured by the __init__ method of a class when an instance of the
@@ -57,30 +73,100 @@ def getname(obj: object) -> str:
     else:
         return obj.__class__.__name__
 
-def gethash(obj: object) -> str:
+algorithms: dict[str, Callable[[bytes], str]] = {
+    'md5': lambda data: md5(data).hexdigest(),
+    'blake2b': lambda data: blake2b(data, digest_size=16).hexdigest(),
+}
+
+if xxhash is not None:
+    algorithms['xxhash'] = xxhash.xxh3_128_hexdigest
+
+def encode(value: Any) -> Any:
+    """
+    Encodes the values that are not JSON serializable when computing hashes. Tensors and numpy
+    arrays are encoded by their dtype, shape and a digest of their content, and dtypes by their name.
+    """
+    if isinstance(value, Tensor):
+        data = value.detach().cpu().contiguous().reshape(-1).view(uint8).numpy()
+        return {'dtype': str(value.dtype), 'shape': list(value.shape), 'digest': blake2b(data, digest_size=16).hexdigest()}
+    if isinstance(value, dtype):
+        return str(value)
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        data = numpy.ascontiguousarray(value).reshape(-1).view('uint8')
+        return {'dtype': str(value.dtype), 'shape': list(value.shape), 'digest': blake2b(data, digest_size=16).hexdigest()}
+    if numpy is not None and isinstance(value, numpy.dtype):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f"Object of type {type(value).__name__} is not hashable by content")
+
+def gethash(obj: object, algorithm: str = 'md5', canonical: bool = True) -> str:
     """
     A function to get an unique deterministic hash of the object calculated from the name and the arguments
     captured by the __init__ method of the object. If the object was not registered, an AttributeError will be
-    raised. The hash will be calculated using the md5 algorithm by default but can be setted manually using the
-    sethash function.
+    raised. The hash is calculated over a canonical encoding of the arguments, with sorted keys and tensors,
+    numpy arrays and dtypes encoded by content, using the md5 algorithm by default. Other algorithms can be
+    chosen from the `algorithms` dictionary ('blake2b', or 'xxhash' when installed) or added to it. Hashes are
+    cached in the object, so they are only computed once per algorithm, until the name of the object is changed
+    with setname. A hash can also be setted manually using the sethash function.
+
+    Breaking change: since arguments are encoded with sorted keys, the hashes of objects whose arguments are
+    not captured in alphabetical order differ from the ones computed by previous versions. Pass `canonical=False`
+    to compute the previous hashes, with the arguments encoded in their captured order, for example to find
+    checkpoints saved under them.
 
     Args:
         obj (object): The object to get the hash from.
+        algorithm (str, optional): The name of the hashing algorithm. Defaults to 'md5'.
+        canonical (bool, optional): Whether to encode the arguments with sorted keys. Defaults to True.
 
     Returns:
         str: The hash of the object.
 
     Raises:
         AttributeError: If the object was not registered and does not have a hash setted. 
+        KeyError: If the algorithm is not available.
     """
-    if not hasattr(obj, '__model__arguments__') and not hasattr(obj, '__model__hash__'):
-        raise AttributeError(f"The object {obj} was not registered and does not have a hash")
-    
     if hasattr(obj, '__model__hash__'):
         return getattr(obj, '__model__hash__')
-    else:
-        arguments = getarguments(obj)
-        return md5((getname(obj) + dumps(arguments)).encode()).hexdigest()
+
+    if not hasattr(obj, '__model__arguments__'):
+        raise AttributeError(f"The object {obj} was not registered and does not have a hash")
+
+    key = algorithm if canonical else f'{algorithm}-legacy'
+    hashes = obj.__dict__.get('__model__hashes__')
+    if hashes is None:
+        hashes = {}
+        object.__setattr__(obj, '__model__hashes__', hashes)
+    elif key in hashes:
+        return hashes[key]
+    hashes[key] = hasharguments(getname(obj), getarguments(obj), algorithm, canonical)
+    return hashes[key]
+
+def hasharguments(name: str, arguments: dict[str, Any], algorithm: str = 'md5', canonical: bool = True) -> str:
+    """
+    A function to calculate the hash of an object from its name and captured arguments, without the object.
+    Is the hash `gethash` returns for an object with the same name and arguments.
+
+    Args:
+        name (str): The name of the object.
+        arguments (dict[str, Any]): The arguments captured by the __init__ method of the object.
+        algorithm (str, optional): The name of the hashing algorithm. Defaults to 'md5'.
+        canonical (bool, optional): Whether to encode the arguments with sorted keys. Defaults to True.
+
+    Returns:
+        str: The hash.
+    """
+    return algorithms[algorithm]((name + dumps(arguments, sort_keys=canonical, default=encode)).encode())
+
+def immutable(obj: object) -> bool:
+    """
+    Returns True if an object has no state that changes during training, this is, if it's not a module
+    or it's a module without parameters or buffers, such as an activation or a dropout layer.
+    """
+    if not isinstance(obj, Module):
+        return True
+    return next(obj.parameters(), None) is None and next(obj.buffers(), None) is None
 
 def sethash(obj: object, hash: str | None = None) -> None:
     """
@@ -100,12 +186,14 @@ def sethash(obj: object, hash: str | None = None) -> None:
 def setname(obj: object, name: str | None = None) -> None:
     """
     A function to set the name of the object. If the name is not provided, it will be retrieved from the
-    class name. If a name is provided, it will be setted as the name of the object.
+    class name. If a name is provided, it will be setted as the name of the object. The hashes cached by
+    gethash are cleared, since they depend on the name.
 
     Args:
         obj (object): The object to set the name.
         name (str, optional): The name to set. Defaults to None.
     """
+    obj.__dict__.pop('__model__hashes__', None)
     if not name:
         setattr(obj, '__model__name__', getname(obj))
     else:
@@ -212,15 +300,31 @@ class Registry[T]:
     A class to register and retrieve types and their signatures. It acts as collection of types and is usefull in cases
     where a python object needs to be created dynamically based on a string name.
 
+    Types can also be included by import path, in which case their module is only imported the first time
+    they are retrieved from the registry. This keeps modules that declare large collections of models cheap
+    to import. Their signatures can be declared when they are included, or are cached in a JSON file after
+    their first import when a cache path is given. Cached signatures are keyed by the import path and the
+    excluded arguments of the type, and are ignored when the file of its module was modified after them.
+    The file of the module is located without importing it or its parent packages, and the cache file
+    is read once per registry.
+
+    Args:
+        cache (str, optional): The path of a JSON file caching the signatures of included types. Defaults to None.
+
     Attributes:
         types (dict): a dictionary of registered types.
         signatures (dict): a dictionary of registered types signatures.
+        paths (dict): a dictionary of included types not imported yet.
 
     Methods:
         register: 
             a decorator to register a type.
+        include:
+            include a type by import path.
         get: 
             get a registered type by name.
+        build:
+            build an object from its metadata.
         keys: 
             get the list of registered type names.
         signature: 
@@ -243,11 +347,21 @@ class Registry[T]:
         instance = registry.get('Foo')(1, 2.0, '3') # instance of Foo
         signature = registry.signature('Foo') # {'x': 'int', 'y': 'float', 'z': 'str'}
         keys = registry.keys() # ['Foo']
+
+        registry = Registry(cache='data/signatures.json')
+        registry.include('src.models:ViT')
+        registry.include('src.models:MLP', 'mlp', signature={'input_size': 'int', 'output_size': 'int'})
+        registry.signature('mlp') # Doesn't import src.models.
+        model = registry.get('mlp')(784, 10) # Imports src.models.
         ```
     """
-    def __init__(self):
-        self.types = dict()
-        self.signatures = dict()
+    def __init__(self, cache: str | None = None):
+        self.types = dict[str, type[T]]()
+        self.signatures = dict[str, dict[str, str]]()
+        self.paths = dict[str, tuple[str, list[int] | None, set[str] | None]]()
+        self.cache = cache
+        self.entries: dict[str, Any] | None = None
+        self.lock = RLock()
 
     @overload
     def register(self, cls: str, excluded_args: list[int] | None = None, excluded_kwargs: set[str] | None = None) -> Callable[[type[T]], type[T]]:
@@ -300,9 +414,57 @@ class Registry[T]:
             raise TypeError("The argument should be a class type or a string")
         
 
+    def include(
+        self,
+        target: str,
+        name: str | None = None,
+        signature: dict[str, str] | None = None,
+        excluded_args: list[int] | None = None,
+        excluded_kwargs: set[str] | None = None
+    ):
+        """
+        Include a class type in the registry by its import path, in the form 'package.module:Class', without importing
+        it. The module is imported and the type registered the first time it is retrieved with the `get` method.
+
+        Args:
+            target (str): The import path of the class type.
+            name (str, optional): The name of the type in the registry. Defaults to the name of the class.
+            signature (dict[str, str], optional): The declared signature of the type. Defaults to None.
+            excluded_args (list[int], optional): The list of argument indexes to be excluded. Defaults to None.
+            excluded_kwargs (set[str], optional): The dictionary of keyword arguments to be excluded. Defaults to None.
+
+        Raises:
+            ValueError: If the import path is not in the form 'package.module:Class'.
+        """
+        module, separator, attribute = target.partition(':')
+        if not separator or not module or not attribute:
+            raise ValueError(f"The import path {target} should be in the form 'package.module:Class'")
+        name = name or attribute.rpartition('.')[2]
+        with self.lock:
+            self.paths[name] = (target, excluded_args, excluded_kwargs)
+            if signature is not None:
+                self.signatures[name] = signature
+
+    def load(self, name: str) -> Optional[type[T]]:
+        target, excluded_args, excluded_kwargs = self.paths[name]
+        module, _, attribute = target.partition(':')
+        cls: Any = import_module(module)
+        for part in attribute.split('.'):
+            cls = getattr(cls, part)
+        with self.lock:
+            if name in self.paths:
+                signature = self.signatures.get(name)
+                if self.types.get(name) is not cls:
+                    self.register(name, excluded_args, excluded_kwargs)(cls)
+                if signature is not None:
+                    self.signatures[name] = signature
+                del self.paths[name]
+        return cls
+
     def get(self, name: str) -> Optional[type[T]]:
         """
-        Get a registered type by name from the registry.
+        Get a registered type by name from the registry. Types included by import path are imported
+        the first time they are retrieved.
 
         Args:
             name (str): the name of the type to be retrieved
@@ -310,20 +472,124 @@ class Registry[T]:
         Returns:
             Optional[type[T]]: the registered type if found, otherwise None
         """
-        return self.types.get(name, None)
+        if name in self.types:
+            return self.types[name]
+        if name in self.paths:
+            return self.load(name)
+        return None
+
+    def build(
+        self,
+        metadata: dict[str, Any],
+        *args: Any,
+        cache: dict[str, Any] | None = None,
+        shared: Callable[[Any], bool] = immutable,
+        **kwargs: Any
+    ) -> T:
+        """
+        Build an object from its metadata, as returned by `getmetadata`, instantiating recursively the registered
+        types of its nested `{'name', 'arguments'}` trees. Arguments given by name only are built when the name is
+        a registered type and the parameter is annotated with a class it derives from, so unannotated or string
+        parameters keep their labels. Arguments that were excluded from the capture, such as the parameters of an
+        optimizer, can be passed as extra positional or keyword arguments.
+
+        Nested objects can be shared between builds with a cache dictionary keyed by their hash. Only objects
+        for which the `shared` predicate is True are cached, by default the ones without state that changes during
+        training, so building many variants of a model constructs their activations or dropouts once.
+
+        Args:
+            metadata (dict[str, Any]): The metadata of the object. Must contain its name and may contain its arguments and hash.
+            *args (Any): Extra positional arguments passed to the type of the object.
+            cache (dict[str, Any], optional): A dictionary of already built nested objects. Defaults to None.
+            shared (Callable[[Any], bool], optional): Whether a built nested object can be cached. Defaults to `immutable`.
+            **kwargs (Any): Extra keyword arguments passed to the type of the object.
+
+        Raises:
+            KeyError: If the name of the object or the name of a nested object is not registered.
+
+        Returns:
+            T: The built object.
+
+        Example:
+            ```python
+            model = registry.build(getmetadata(model))
+            optimizer = registry.build({'name': 'Adam', 'arguments': {'lr': 0.001}}, model.parameters())
+
+            variants = registry.build_many([
+                {'name': 'MLP', 'arguments': {'hidden_size': size, 'activation': 'ReLU'}} for size in (64, 128, 256)
+            ])
+            ```
+        """
+        name = metadata['name']
+        cls = self.get(name)
+        if cls is None:
+            raise KeyError(f"The type {name} is not registered")
+        parameters = signature(cls).parameters
+        arguments = {
+            key: self.argument(value, parameters[key].annotation if key in parameters else Any, cache, shared)
+            for key, value in metadata.get('arguments', {}).items()
+        }
+        obj = cls(*args, **(arguments | kwargs))
+        if 'hash' in metadata:
+            sethash(obj, metadata['hash'])
+        return obj
+
+    def argument(self, value: Any, annotation: Any, cache: dict[str, Any] | None, shared: Callable[[Any], bool]) -> Any:
+        if isinstance(value, dict) and value.keys() == {'name', 'arguments'} and value['name'] in self:
+            name, arguments = value['name'], value['arguments']
+        elif isinstance(value, str) and value in self and self.accepts(annotation, value):
+            name, arguments = value, {}
+        else:
+            return value
+        if cache is None:
+            return self.build({'name': name, 'arguments': arguments}, shared=shared)
+        key = hasharguments(name, arguments)
+        if key in cache:
+            return cache[key]
+        obj = self.build({'name': name, 'arguments': arguments}, cache=cache, shared=shared)
+        if shared(obj):
+            cache[key] = obj
+        return obj
+
+    def accepts(self, annotation: Any, name: str) -> bool:
+        cls = self.get(name)
+        candidates = get_args(annotation) if get_origin(annotation) in (Union, UnionType) else (annotation,)
+        return cls is not None and any(
+            isinstance(candidate, type) and candidate is not str and issubclass(cls, candidate)
+            for candidate in candidates
+        )
+
+    def build_many(self, metadatas: Iterable[dict[str, Any]], shared: Callable[[Any], bool] = immutable) -> list[T]:
+        """
+        Build many objects from their metadata, sharing their identical nested objects. See `build`.
+
+        Args:
+            metadatas (Iterable[dict[str, Any]]): The metadata of the objects.
+            shared (Callable[[Any], bool], optional): Whether a built nested object can be shared. Defaults to `immutable`.
+
+        Returns:
+            list[T]: The built objects.
+        """
+        cache = dict[str, Any]()
+        return [self.build(metadata, cache=cache, shared=shared) for metadata in metadatas]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.types or name in self.paths
 
     def keys(self) -> list[str]:
         '''
-        Get the list of registered type names.
+        Get the list of registered type names, including the types not imported yet.
 
         Returns:
             list[str]: the list of registered type names
         '''
-        return list(self.types.keys())
+        return list(self.types.keys()) + [name for name in self.paths.keys() if name not in self.types]
 
     def signature(self, name: str) -> Optional[dict[str, str]]:
         '''
-        Get the signature of a registered type by name.
+        Get the signature of a registered type by name. The signature of a type included by import
+        path is retrieved from its declaration or from the cache file if possible, and otherwise the
+        type is imported and its signature written to the cache file.
 
         Parameters:
             name (str): the name of the type to be retrieved.
@@ -331,4 +597,49 @@ class Registry[T]:
         Returns:
             dict[str, str]: the signature of the registered type.
         '''
-        return self.signatures.get(name, None)
\ No newline at end of file
+        if name in self.signatures:
+            return self.signatures[name]
+        if name not in self.paths:
+            return None
+        target, excluded_args, excluded_kwargs = self.paths[name]
+        key = dumps([target, sorted(excluded_args or []), sorted(excluded_kwargs or [])])
+        modified = self.modified(target)
+        entry = self.cached().get(key)
+        if entry is not None and entry.get('modified') == modified:
+            self.signatures[name] = entry['signature']
+            return entry['signature']
+        self.load(name)
+        signature = self.signatures.get(name)
+        if self.cache is not None and signature is not None:
+            with self.lock:
+                entries = self.cached()
+                entries[key] = {'signature': signature, 'modified': modified}
+                temporary = f'{self.cache}.tmp'
+                with open(temporary, 'w') as file:
+                    file.write(dumps(entries, indent=2, sort_keys=True))
+                replace(temporary, self.cache)
+        return signature
+
+    def modified(self, target: str) -> float | None:
+        spec, locations = None, None
+        for module in accumulate(target.partition(':')[0].split('.'), lambda parent, name: f'{parent}.{name}'):
+            spec = PathFinder.find_spec(module, locations)
+            if spec is None:
+                return None
+            locations = spec.submodule_search_locations
+        if spec is None or spec.origin is None or not spec.has_location:
+            return None
+        try:
+            return path.getmtime(spec.origin)
+        except OSError:
+            return None
+
+    def cached(self) -> dict[str, Any]:
+        with self.lock:
+            if self.entries is None:
+                entries: dict[str, Any] = {}
+                if self.cache is not None and path.exists(self.cache):
+                    with open(self.cache) as file:
+                        entries = loads(file.read())
+                self.entries = entries
+            return self.entries
\ No newline at end of file
@@ -14,7 +14,9 @@
 
 from typing import Any 
 from copy import deepcopy
+from functools import wraps
 from inspect import signature
+from collections.abc import Iterator
 
 def cls_signature(cls: type, excluded_args: list[int] | None = None, excluded_kwargs: set[str] | None = None):
     excluded_args = excluded_args or []
@@ -30,12 +32,12 @@ def handle_arg(arg):
     if hasattr(arg, '__model__arguments__'):
         arguments = getattr(arg, '__model__arguments__')
         if arguments:
-            return deepcopy({
+            return {
                 'name': getattr(arg, '__model__name__') if hasattr(arg, '__model__name__') else arg.__class__.__name__,
-                'arguments': getattr(arg, '__model__arguments__')
-            })
+                'arguments': arguments
+            }
         else:
-            return deepcopy(getattr(arg, '__model__name__') if hasattr(arg, '__model__name__') else arg.__class__.__name__)
+            return getattr(arg, '__model__name__') if hasattr(arg, '__model__name__') else arg.__class__.__name__
     else:
         return arg    
 
@@ -44,15 +46,68 @@ def cls_parse_args(args: tuple[Any], excluded_args: list[int], signature: dict[s
     for index, (arg, key) in enumerate(zip(args, signature.keys())):
         if index not in excluded_args:
             kargs[key] = handle_arg(arg)
-    return deepcopy(kargs)
+    return kargs
 
 def cls_parse_kwargs(kwargs: dict[str, Any], excluded_kwargs: set[str]) -> dict[str, Any]:
     kargs = {}
     for key, arg in kwargs.items():
         if key not in excluded_kwargs:
             kargs[key] = handle_arg(arg)
-    return deepcopy(kargs)
-    
+    return kargs
+
+def cls_capture(arg: Any) -> Any:
+    if type(arg) is list:
+        return [cls_capture(item) for item in arg]
+    if type(arg) is tuple:
+        return tuple(cls_capture(item) for item in arg)
+    if type(arg) is dict:
+        return {key: cls_capture(item) for key, item in arg.items()}
+    if type(arg) is set:
+        return set(arg)
+    return arg
+
+def cls_capture_args(
+    args: tuple[Any],
+    kwargs: dict[str, Any],
+    excluded_args: list[int],
+    excluded_kwargs: set[str],
+    signature: dict[str, str]
+) -> dict[str, Any]:
+    captured = {}
+    for index, (arg, key) in enumerate(zip(args, signature.keys())):
+        if index not in excluded_args and not isinstance(arg, Iterator):
+            captured[key] = cls_capture(arg)
+    for key, arg in kwargs.items():
+        if key not in excluded_kwargs and not isinstance(arg, Iterator):
+            captured[key] = cls_capture(arg)
+    return captured
+
+class Arguments:
+    """
+    A descriptor that materializes the `__model__arguments__` of an object from the raw arguments
+    captured by the overridden `__init__` the first time they are accessed, and caches them in the
+    object. Instances whose arguments are never inspected don't pay for parsing and copying them.
+
+    Lists, tuples, dictionaries and sets are copied recursively when captured, so changing them after
+    the object was created doesn't change its arguments. Other objects, like tensors, are captured by
+    reference and copied when the arguments are first read.
+
+    Excluded arguments and one-shot iterators, such as the parameter generators passed to optimizers,
+    are never captured, so objects can be copied and pickled before their arguments are read. The
+    arguments only exist on instances: accessing them on the class raises `AttributeError`.
+    """
+    def __get__(self, obj: Any, owner: type | None = None) -> dict[str, Any]:
+        if obj is None:
+            raise AttributeError('__model__arguments__')
+        try:
+            captured = object.__getattribute__(obj, '__model__capture__')
+        except AttributeError:
+            raise AttributeError('__model__arguments__') from None
+        arguments = deepcopy({key: handle_arg(arg) for key, arg in captured.items()})
+        object.__setattr__(obj, '__model__arguments__', arguments)
+        object.__delattr__(obj, '__model__capture__')
+        return arguments
+
 def cls_override_init(
     cls: type,
     excluded_args: list[int] | None = None,
@@ -63,10 +118,14 @@ def cls_override_init(
     signature = cls_signature(cls)
     excluded_args = excluded_args or []
     excluded_kwargs = excluded_kwargs or set()
+    setattr(cls, '__model__arguments__', Arguments())
+    @wraps(init)
     def init_wrapper(obj, *args, **kwargs):
         init(obj, *args, **kwargs)
-        arguments = cls_parse_args(args, excluded_args, signature) | cls_parse_kwargs(kwargs, excluded_kwargs)
-        setattr(obj, '__model__arguments__', arguments)
+        captured = cls_capture_args(args, kwargs, excluded_args, excluded_kwargs, signature)
+        object.__setattr__(obj, '__model__capture__', captured)
+        obj.__dict__.pop('__model__arguments__', None)
+        obj.__dict__.pop('__model__hashes__', None)
         if name:
             setattr(obj, '__model__name__', name)
     setattr(cls, '__init__', init_wrapper) 
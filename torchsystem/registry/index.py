@@ -0,0 +1,221 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from json import dumps, loads
+from typing import Any
+from sqlite3 import connect
+from threading import Lock
+
+from torchsystem.registry.accessors import encode
+from torchsystem.registry.accessors import getname, gethash, getarguments
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (hash TEXT PRIMARY KEY, name TEXT NOT NULL, arguments TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS arguments (hash TEXT NOT NULL, key TEXT NOT NULL, number REAL, text TEXT, PRIMARY KEY (hash, key));
+CREATE TABLE IF NOT EXISTS artifacts (hash TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (hash, path));
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+CREATE INDEX IF NOT EXISTS arguments_number ON arguments (key, number);
+CREATE INDEX IF NOT EXISTS arguments_text ON arguments (key, text);
+'''
+
+def flatten(arguments: dict[str, Any], prefix: str = '') -> dict[str, Any]:
+    """
+    Flattens the arguments captured by the registry into a dictionary of dotted keys. Nested registered objects
+    are flattened under their argument name, with their name under the `name` key.
+
+    Args:
+        arguments (dict[str, Any]): The captured arguments.
+        prefix (str, optional): The prefix of the keys. Defaults to ''.
+
+    Returns:
+        dict[str, Any]: The flattened arguments.
+
+    Example:
+        ```python
+        flatten({'dimension': 128, 'activation': 'ReLU', 'head': {'name': 'Linear', 'arguments': {'out_features': 10}}})
+        # {'dimension': 128, 'activation': 'ReLU', 'head.name': 'Linear', 'head.out_features': 10}
+        ```
+    """
+    flattened = {}
+    for key, value in arguments.items():
+        if isinstance(value, dict) and value.keys() == {'name', 'arguments'}:
+            flattened[f'{prefix}{key}.name'] = value['name']
+            flattened.update(flatten(value['arguments'], f'{prefix}{key}.'))
+        else:
+            flattened[f'{prefix}{key}'] = value
+    return flattened
+
+def column(value: Any) -> tuple[float | None, str | None]:
+    if isinstance(value, (bool, int, float)):
+        return float(value), None
+    if isinstance(value, str):
+        return None, value
+    return None, dumps(value, sort_keys=True, default=encode)
+
+class Index:
+    """
+    A persistent index of registered objects backed by SQLite. Each entry maps the hash of an object to its
+    name, its arguments and the paths of its artifacts (for example its checkpoints). Arguments are flattened
+    into dotted keys and stored in indexed columns, so objects can be found by equality or range conditions
+    over their arguments without loading or scanning anything else.
+
+    The index is updated incrementally: each call to `add` or `attach` is committed on its own.
+
+    Args:
+        path (str, optional): The path of the database file. Defaults to ':memory:'.
+
+    Example:
+        ```python
+        from torchsystem.registry.index import Index
+
+        index = Index('data/registry.db')
+        index.add(model, 'data/weights/ViT-af51a51a.pth')
+        ...
+        for hash in index.query('ViT', model_dimension=128, dropout=(None, 0.2)):
+            print(index.metadata(hash), index.paths(hash))
+
+        hashes = index.query(where={'encoder.layers': (4, 8)})
+        ```
+    """
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self.connection = connect(path, check_same_thread=False)
+        self.lock = Lock()
+        with self.lock, self.connection:
+            if path != ':memory:':
+                self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.executescript(SCHEMA)
+
+    def add(self, obj: object, *paths: str) -> str:
+        """
+        Adds a registered object to the index, or updates it, optionally attaching the paths of its artifacts.
+
+        Args:
+            obj (object): The registered object.
+            *paths (str): The paths of the artifacts of the object.
+
+        Raises:
+            AttributeError: If the object was not registered.
+
+        Returns:
+            str: The hash of the object.
+        """
+        hash = gethash(obj)
+        self.put(hash, getname(obj), getarguments(obj), *paths)
+        return hash
+
+    def put(self, hash: str, name: str, arguments: dict[str, Any], *paths: str):
+        """
+        Adds an entry to the index, or updates it, from its hash, name and arguments.
+
+        Args:
+            hash (str): The hash of the entry.
+            name (str): The name of the entry.
+            arguments (dict[str, Any]): The arguments of the entry.
+            *paths (str): The paths of the artifacts of the entry.
+        """
+        rows = [(hash, key, *column(value)) for key, value in flatten(arguments).items()]
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?)',
+                (hash, name, dumps(arguments, sort_keys=True, default=encode))
+            )
+            self.connection.execute('DELETE FROM arguments WHERE hash = ?', (hash,))
+            self.connection.executemany('INSERT INTO arguments VALUES (?, ?, ?, ?)', rows)
+            self.connection.executemany('INSERT OR IGNORE INTO artifacts VALUES (?, ?)', [(hash, path) for path in paths])
+
+    def attach(self, hash: str, path: str):
+        """
+        Attaches the path of an artifact to an entry of the index.
+
+        Args:
+            hash (str): The hash of the entry.
+            path (str): The path of the artifact.
+        """
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR IGNORE INTO artifacts VALUES (?, ?)', (hash, path))
+
+    def query(self, name: str | None = None, where: dict[str, Any] | None = None, **arguments: Any) -> list[str]:
+        """
+        Finds the hashes of the entries matching all the given conditions. A condition over an argument is
+        either a value, matched by equality, or a tuple with lower and upper bounds, inclusive, where None
+        leaves a side open. Nested arguments are given by their dotted keys in the `where` dictionary.
+
+        Args:
+            name (str, optional): The name of the entries. Defaults to None, which matches any name.
+            where (dict[str, Any], optional): Conditions over dotted argument keys. Defaults to None.
+            **arguments (Any): Conditions over the arguments.
+
+        Returns:
+            list[str]: The hashes of the matching entries.
+        """
+        clauses, parameters = list[str](), list[Any]()
+        if name is not None:
+            clauses.append('name = ?')
+            parameters.append(name)
+        for key, condition in ((where or {}) | arguments).items():
+            if isinstance(condition, tuple):
+                lower, upper = condition
+                bounds = ['key = ?']
+                parameters.append(key)
+                if lower is not None:
+                    bounds.append('number >= ?')
+                    parameters.append(lower)
+                if upper is not None:
+                    bounds.append('number <= ?')
+                    parameters.append(upper)
+                clauses.append(f'hash IN (SELECT hash FROM arguments WHERE {" AND ".join(bounds)})')
+            else:
+                number, text = column(condition)
+                field, value = ('number', number) if number is not None else ('text', text)
+                clauses.append(f'hash IN (SELECT hash FROM arguments WHERE key = ? AND {field} = ?)')
+                parameters.extend((key, value))
+        statement = 'SELECT hash FROM entries' + (' WHERE ' + ' AND '.join(clauses) if clauses else '')
+        with self.lock:
+            return [hash for (hash,) in self.connection.execute(statement, parameters)]
+
+    def metadata(self, hash: str) -> dict[str, Any] | None:
+        """
+        Returns the metadata of an entry, in the form returned by `getmetadata`.
+
+        Args:
+            hash (str): The hash of the entry.
+
+        Returns:
+            dict[str, Any] | None: The hash, name and arguments of the entry, or None if it's not indexed.
+        """
+        with self.lock:
+            row = self.connection.execute('SELECT name, arguments FROM entries WHERE hash = ?', (hash,)).fetchone()
+        if row is None:
+            return None
+        return {'hash': hash, 'name': row[0], 'arguments': loads(row[1])}
+
+    def paths(self, hash: str) -> list[str]:
+        """
+        Returns the paths of the artifacts attached to an entry.
+
+        Args:
+            hash (str): The hash of the entry.
+
+        Returns:
+            list[str]: The paths of the artifacts.
+        """
+        with self.lock:
+            return [path for (path,) in self.connection.execute('SELECT path FROM artifacts WHERE hash = ? ORDER BY rowid', (hash,))]
+
+    def close(self):
+        """
+        Closes the connection with the database.
+        """
+        with self.lock:
+            self.connection.close()
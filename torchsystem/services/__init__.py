@@ -4,4 +4,7 @@ from torchsystem.services.pubsub import Subscriber as Subscriber
 from torchsystem.services.pubsub import Publisher as Publisher
 from torchsystem.services.prodcon import Consumer as Consumer
 from torchsystem.services.prodcon import Producer as Producer
-from torchsystem.services.prodcon import event as event
\ No newline at end of file
+from torchsystem.services.prodcon import event as event
+from torchsystem.services.codec import Codec as Codec
+from torchsystem.services.transport import Sender as Sender
+from torchsystem.services.transport import Receiver as Receiver
\ No newline at end of file
@@ -0,0 +1,119 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from time import monotonic
+from queue import Queue, Empty
+from typing import Any
+from threading import Thread, Lock
+from collections.abc import Callable, Collection
+from concurrent.futures import Future
+
+from torch import Tensor
+from torch import stack
+
+def collate(values: list[Any]) -> Any:
+    if isinstance(values[0], Tensor):
+        return stack(values)
+    return values
+
+def split(output: Any, count: int) -> list[Any]:
+    if isinstance(output, Tensor) and output.dim() and output.shape[0] == count:
+        return list(output.unbind(0))
+    if isinstance(output, tuple):
+        return list(zip(*(split(item, count) for item in output)))
+    if isinstance(output, list) and len(output) == count:
+        return output
+    raise TypeError(f'Cannot split an output of type {type(output).__name__} in {count} results')
+
+class Batcher:
+    """
+    A BATCHER groups concurrent calls to a handler into a single call with batched inputs. This is
+    the usual way to serve models, where running a forward pass over a batch costs about the same
+    as running it over a single sample.
+
+    Calls are queued and collected by a background thread until the maximum batch size is reached
+    or the oldest call waited the maximum wait time. The positional arguments of the collected calls
+    are stacked along a new first dimension if they are tensors and gathered in lists otherwise,
+    except for the shared arguments (for example the model), which are passed once. Calls are only
+    batched together when they pass the same objects as shared arguments, and the handler is called
+    once per batch. Its output is split along the first dimension and each caller
+    receives its own slice. Tuples of outputs are split element-wise. If the handler raises an
+    exception, it is raised to all the callers of the batch.
+
+    Args:
+        handler (Callable[..., Any]): The handler to call with batched inputs.
+        size (int): The maximum number of calls per batch.
+        wait (float): The maximum time in seconds a call waits for a batch to be filled.
+        shared (Collection[int], optional): The positions of the arguments passed once per batch. Defaults to none.
+
+    Example:
+        ```python
+        @service.handler(batch=32, wait=0.005, shared={'model'})
+        def predict(model: Model, inputs: Tensor):
+            return model(inputs) # inputs are stacked, outputs are split.
+
+        output = service.handle('predict', model, input) # Called concurrently from many threads.
+        ```
+    """
+    def __init__(self, handler: Callable[..., Any], size: int, wait: float, shared: Collection[int] = ()):
+        self.handler = handler
+        self.size = size
+        self.wait = wait
+        self.shared = frozenset(shared)
+        self.queue = Queue[tuple[tuple, Future]]()
+        self.worker: Thread | None = None
+        self.lock = Lock()
+
+    def __call__(self, *arguments: Any) -> Any:
+        if self.worker is None:
+            with self.lock:
+                if self.worker is None:
+                    self.worker = Thread(target=self.run, daemon=True)
+                    self.worker.start()
+        future: Future[Any] = Future()
+        self.queue.put((arguments, future))
+        return future.result()
+
+    def run(self):
+        while True:
+            requests = [self.queue.get()]
+            deadline = monotonic() + self.wait
+            while len(requests) < self.size:
+                try:
+                    requests.append(self.queue.get(timeout=max(deadline - monotonic(), 0)))
+                except Empty:
+                    break
+            self.process(requests)
+
+    def process(self, requests: list[tuple[tuple, Future]]):
+        groups = dict[tuple[int, ...], list[tuple[tuple, Future]]]()
+        for arguments, future in requests:
+            key = tuple(id(argument) for index, argument in enumerate(arguments) if index in self.shared)
+            groups.setdefault(key, []).append((arguments, future))
+        for group in groups.values():
+            self.call(group)
+
+    def call(self, requests: list[tuple[tuple, Future]]):
+        futures = [future for _, future in requests]
+        try:
+            arguments = [
+                values[0] if index in self.shared else collate(list(values))
+                for index, values in enumerate(zip(*(arguments for arguments, _ in requests)))
+            ]
+            results = split(self.handler(*arguments), len(requests))
+        except BaseException as exception:
+            for future in futures:
+                future.set_exception(exception)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
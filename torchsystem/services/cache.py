@@ -0,0 +1,183 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from sys import getsizeof
+from time import monotonic
+from typing import Any
+from hashlib import blake2b
+from inspect import iscoroutinefunction
+from functools import wraps
+from threading import Lock
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import torch
+from torch import Tensor
+from torchsystem.registry import gethash
+
+def digest(tensor: Tensor) -> bytes:
+    data = tensor.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy()
+    return blake2b(data, digest_size=16).digest()
+
+def fingerprint(value: Any) -> Hashable:
+    """
+    Builds a hashable key from a value. Tensors are keyed by their device, dtype, shape and a digest
+    of their content, registered objects by their registry hash, and containers recursively. Other
+    hashable values are keyed by their type and value, so `1`, `1.0` and `True` are different keys.
+
+    Args:
+        value (Any): The value to build the key from.
+
+    Raises:
+        TypeError: If the value is not hashable and can't be keyed by content.
+
+    Returns:
+        Hashable: The key.
+    """
+    if isinstance(value, Tensor):
+        return ('tensor', str(value.device), str(value.dtype), tuple(value.shape), digest(value))
+    if hasattr(value, '__model__arguments__') or hasattr(value, '__model__hash__'):
+        return ('registered', gethash(value))
+    if isinstance(value, (tuple, list)):
+        return (type(value).__name__, tuple(fingerprint(item) for item in value))
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((key, fingerprint(item)) for key, item in value.items())))
+    if isinstance(value, Hashable):
+        return (type(value), value)
+    raise TypeError(f'Cannot build a cache key from a value of type {type(value).__name__}')
+
+def sizeof(value: Any) -> int:
+    if isinstance(value, Tensor):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return getsizeof(value) + sum(sizeof(item) for item in value)
+    if isinstance(value, dict):
+        return getsizeof(value) + sum(sizeof(item) for item in value.values())
+    return getsizeof(value)
+
+class Cache:
+    """
+    A bounded memoization cache for deterministic handlers. Results are kept in least recently
+    used order up to a maximum number of entries and optionally expire after a time to live.
+
+    Calls are keyed by their arguments: tensors by a blake2b digest of their content, registered
+    objects (see `torchsystem.registry`) by their hash, and other values as they are. Keying a
+    registered module by its hash assumes it is frozen, since the hash doesn't change when its
+    weights are updated. Cached results are returned as they are, so they should not be mutated.
+
+    A cache is used as a decorator or passed to `Service.handler`, in which case the dependencies
+    of the handler are not even resolved on a cache hit. Coroutine functions are wrapped by a
+    coroutine function that caches the awaited result.
+
+    Args:
+        maxsize (int, optional): The maximum number of cached results. Defaults to 128.
+        ttl (float, optional): The time in seconds a result stays valid. Defaults to None, which never expires.
+
+    Attributes:
+        hits (int): The number of calls served from the cache.
+        misses (int): The number of calls that executed the handler.
+        memory (int): The approximate memory used by the cached results in bytes.
+
+    Example:
+        ```python
+        from torchsystem.services import Service
+        from torchsystem.services.cache import Cache
+
+        service = Service()
+
+        @service.handler(cache=Cache(maxsize=256, ttl=600))
+        def extract_features(encoder: Encoder, batch: Tensor):
+            with inference_mode():
+                return encoder(batch)
+
+        ...
+        print(service.caches['extract-features'].hit_rate)
+        ```
+    """
+    def __init__(self, maxsize: int = 128, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict[Hashable, tuple[Any, float, int]]()
+        self.hits = 0
+        self.misses = 0
+        self.memory = 0
+        self.lock = Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of calls served from the cache.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expiration, size = entry
+                if self.ttl is None or expiration > monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self.entries[key]
+                self.memory -= size
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Any):
+        size = sizeof(value)
+        expiration = monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self.lock:
+            if key in self.entries:
+                self.memory -= self.entries.pop(key)[2]
+            self.entries[key] = (value, expiration, size)
+            self.memory += size
+            while len(self.entries) > self.maxsize:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.memory -= evicted
+
+    def clear(self):
+        """
+        Removes all the cached results. The hit and miss counters are kept.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.memory = 0
+
+    def __call__(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        if iscoroutinefunction(function):
+            @wraps(function)
+            async def coroutine(*args, **kwargs):
+                key = (function, fingerprint(args), fingerprint(kwargs))
+                hit, value = self.get(key)
+                if hit:
+                    return value
+                value = await function(*args, **kwargs)
+                self.put(key, value)
+                return value
+            return coroutine
+        
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            key = (function, fingerprint(args), fingerprint(kwargs))
+            hit, value = self.get(key)
+            if hit:
+                return value
+            value = function(*args, **kwargs)
+            self.put(key, value)
+            return value
+        return wrapper
@@ -0,0 +1,251 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from zlib import crc32
+from struct import Struct
+from typing import Any
+from typing import Iterable
+from typing import get_type_hints
+from operator import attrgetter
+from dataclasses import fields, is_dataclass
+
+import torch
+from torch import Tensor
+
+DTYPES = (
+    torch.float32, torch.float64, torch.float16, torch.bfloat16,
+    torch.int8, torch.int16, torch.int32, torch.int64, torch.uint8,
+    torch.bool, torch.complex64, torch.complex128,
+)
+
+FIXED = {int: 'q', float: 'd', bool: '?'}
+VARIABLE = {str: 's', bytes: 'b', Tensor: 't'}
+
+HEADER = Struct('<4sHI')
+MAGIC = b'TSEV'
+LENGTH = Struct('<I')
+TENSOR = Struct('<BB')
+
+class Codec[T]:
+    """
+    A CODEC is a compact binary encoder and decoder for EVENTS created with the `event` decorator.
+    The binary layout is built once per EVENT type from its field annotations, so encoding and
+    decoding a message is a matter of packing its values with a precompiled `struct.Struct`
+    instead of pickling a full python object graph.
+
+    Fields annotated as `int`, `float` and `bool` are packed together in a fixed size block. Fields
+    annotated as `str`, `bytes` or `Tensor` are appended after it with a length prefix. Tensors are
+    written as their dtype, shape and raw buffer. Any other annotation is rejected when the codec
+    is built.
+
+    Every payload starts with a header that carries a schema fingerprint and a version number. Decoding
+    a payload produced by a different schema or version raises a `ValueError` instead of silently
+    building a corrupted EVENT.
+
+    Attributes:
+        type (type[T]): The EVENT type handled by the codec.
+        version (int): The schema version written in the header.
+        fingerprint (int): A checksum of the EVENT's name and field layout.
+
+    Methods:
+        encode:
+            Encodes a single EVENT into bytes.
+
+        decode:
+            Decodes a single EVENT from bytes.
+
+        encode_many:
+            Encodes a sequence of EVENTS into a single payload.
+
+        decode_many:
+            Decodes a payload produced by `encode_many` into a list of EVENTS.
+
+    Example:
+        ```python
+        from torch import Tensor
+        from torchsystem.services import event
+        from torchsystem.services import Codec
+
+        @event
+        class Batched:
+            epoch: int
+            loss: float
+            outputs: Tensor
+
+        codec = Codec(Batched, version=1)
+        data = codec.encode(Batched(1, 0.25, outputs))
+        message = codec.decode(data)
+
+        data = codec.encode_many([Batched(1, 0.25, outputs), Batched(2, 0.21, outputs)])
+        messages = codec.decode_many(data)
+        ```
+    """
+    def __init__(self, type: type[T], version: int = 0):
+        self.type = type
+        if not is_dataclass(type):
+            raise TypeError(f"The type {type.__name__} is not an event")
+        annotations = get_type_hints(type)
+        self.version = version
+        self.names = [field.name for field in fields(type)]
+        self.fixed = list[int]()
+        self.variable = list[tuple[int, str]]()
+        codes = []
+        for index, name in enumerate(self.names):
+            annotation = annotations[name]
+            if annotation in FIXED:
+                self.fixed.append(index)
+                codes.append(f'{name}:{FIXED[annotation]}')
+            elif annotation in VARIABLE:
+                self.variable.append((index, VARIABLE[annotation]))
+                codes.append(f'{name}:{VARIABLE[annotation]}')
+            else:
+                raise TypeError(f"Unsupported annotation {annotation} for field {name} of event {type.__name__}")
+        self.fingerprint = crc32(f"{type.__name__}({','.join(codes)})".encode())
+        self.struct = Struct('<' + ''.join(FIXED[annotations[self.names[index]]] for index in self.fixed))
+        self.getter = attrgetter(*self.names) if self.names else lambda message: ()
+        self.header = HEADER.pack(MAGIC, self.version, self.fingerprint)
+
+    def values(self, message: T) -> tuple:
+        values = self.getter(message)
+        return values if len(self.names) != 1 else (values,)
+
+    def write(self, message: T, chunks: list[bytes]):
+        values = self.values(message)
+        chunks.append(self.struct.pack(*[values[index] for index in self.fixed]))
+        for index, kind in self.variable:
+            value = values[index]
+            if kind == 't':
+                tensor = value.detach().cpu().contiguous()
+                chunks.append(TENSOR.pack(DTYPES.index(tensor.dtype), tensor.dim()))
+                chunks.append(Struct(f'<{tensor.dim()}q').pack(*tensor.shape))
+                chunks.append(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+            else:
+                data = value.encode() if kind == 's' else value
+                chunks.append(LENGTH.pack(len(data)))
+                chunks.append(data)
+
+    def read(self, buffer: memoryview, offset: int) -> tuple[T, int]:
+        values: list[Any] = [None] * len(self.names)
+        for index, value in zip(self.fixed, self.struct.unpack_from(buffer, offset)):
+            values[index] = value
+        offset += self.struct.size
+        for index, kind in self.variable:
+            if kind == 't':
+                code, dimensions = TENSOR.unpack_from(buffer, offset)
+                offset += TENSOR.size
+                shape = Struct(f'<{dimensions}q').unpack_from(buffer, offset)
+                offset += 8 * dimensions
+                dtype = DTYPES[code]
+                size = torch.Size(shape).numel() * dtype.itemsize
+                if size:
+                    values[index] = torch.frombuffer(bytearray(buffer[offset:offset + size]), dtype=torch.uint8).view(dtype).reshape(shape)
+                else:
+                    values[index] = torch.empty(shape, dtype=dtype)
+            else:
+                (size,) = LENGTH.unpack_from(buffer, offset)
+                offset += LENGTH.size
+                data = bytes(buffer[offset:offset + size])
+                values[index] = data.decode() if kind == 's' else data
+            offset += size
+        return self.type(*values), offset
+
+    def check(self, buffer: memoryview) -> int:
+        if len(buffer) < HEADER.size:
+            raise ValueError("The payload is too short to contain an event header")
+        magic, version, fingerprint = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("The payload is not an encoded event")
+        if fingerprint != self.fingerprint:
+            raise ValueError(f"The payload schema does not match the schema of {self.type.__name__}")
+        if version != self.version:
+            raise ValueError(f"The payload version {version} does not match the codec version {self.version}")
+        return HEADER.size
+
+    def encode(self, message: T) -> bytes:
+        """
+        Encodes a single EVENT into bytes.
+
+        Args:
+            message (T): The EVENT to encode.
+
+        Returns:
+            bytes: The encoded EVENT preceded by the schema header.
+        """
+        chunks = [self.header]
+        self.write(message, chunks)
+        return b''.join(chunks)
+
+    def decode(self, data: bytes | bytearray | memoryview) -> T:
+        """
+        Decodes a single EVENT from bytes.
+
+        Args:
+            data (bytes): A payload produced by the `encode` method.
+
+        Raises:
+            ValueError: If the payload was not produced with the same schema and version.
+
+        Returns:
+            T: The decoded EVENT.
+        """
+        buffer = memoryview(data)
+        message, _ = self.read(buffer, self.check(buffer))
+        return message
+
+    def encode_many(self, messages: Iterable[T]) -> bytes:
+        """
+        Encodes a sequence of EVENTS into a single payload. The schema header is written only once.
+        When all the fields of the EVENT have a fixed size the records are packed back to back
+        without any per record overhead.
+
+        Args:
+            messages (Iterable[T]): The EVENTS to encode.
+
+        Returns:
+            bytes: The encoded EVENTS.
+        """
+        messages = list(messages)
+        chunks = [self.header, LENGTH.pack(len(messages))]
+        if not self.variable:
+            pack = self.struct.pack
+            chunks.extend(pack(*self.values(message)) for message in messages)
+        else:
+            for message in messages:
+                self.write(message, chunks)
+        return b''.join(chunks)
+
+    def decode_many(self, data: bytes | bytearray | memoryview) -> list[T]:
+        """
+        Decodes a payload produced by the `encode_many` method into a list of EVENTS.
+
+        Args:
+            data (bytes): A payload produced by the `encode_many` method.
+
+        Raises:
+            ValueError: If the payload was not produced with the same schema and version.
+
+        Returns:
+            list[T]: The decoded EVENTS in the order they were encoded.
+        """
+        buffer = memoryview(data)
+        offset = self.check(buffer)
+        (count,) = LENGTH.unpack_from(buffer, offset)
+        offset += LENGTH.size
+        if not self.variable:
+            end = offset + count * self.struct.size
+            return [self.type(*values) for values in self.struct.iter_unpack(buffer[offset:end])] if self.struct.size else [self.type() for _ in range(count)]
+        messages = list[T]()
+        for _ in range(count):
+            message, offset = self.read(buffer, offset)
+            messages.append(message)
+        return messages
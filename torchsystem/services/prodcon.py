@@ -16,11 +16,13 @@ from re import sub
 from typing import Callable
 from typing import Any
 from typing import Union 
+from typing import dataclass_transform
 from inspect import signature
 from dataclasses import dataclass
 
 from torchsystem.depends import inject, Provider
 from torchsystem.depends import Depends as Depends
+from torchsystem.services.telemetry import Telemetry
 
 class Consumer:    
     """
@@ -79,9 +81,11 @@ class Consumer:
         name: str | None = None,
         *,
         provider: Provider | None = None,
-        generator: Callable[[str], str] = lambda name: sub(r'(?<!^)(?=[A-Z])', '-', name).lower()
+        generator: Callable[[str], str] = lambda name: sub(r'(?<!^)(?=[A-Z])', '-', name).lower(),
+        telemetry: Telemetry | None = None
     ):
         self.name = name
+        self.telemetry = telemetry
         self.handlers = dict[str, list[Callable[[Any], None]]]()
         self.types = dict[str, Any]()
         self.generator = generator
@@ -137,7 +141,10 @@ class Consumer:
         else:
             key = self.generator(annotation.__name__)
             self.types[key] = annotation    
-            injected = inject(self.provider)(handler)
+            if self.telemetry:
+                injected = self.telemetry.inject(self.provider, 'consumer', key)(handler)
+            else:
+                injected = inject(self.provider)(handler)
             self.handlers.setdefault(key, []).append(injected)
             return injected    
         return handler
@@ -228,6 +235,7 @@ class Producer:
             consumer.consume(message)
 
 
+@dataclass_transform()
 def event(cls: type):
     """ 
     A decorator to define an Event message. An event will store weak references to objects
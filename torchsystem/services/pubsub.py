@@ -12,11 +12,233 @@
 # For inquiries, visit: entropy-flux.github.io/TorchSystem/
 
 
+from time import perf_counter, monotonic
+from array import array
 from typing import Any
+from logging import getLogger
+from threading import Lock
 from collections.abc import Callable
+from concurrent.futures import Executor, Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 
 from torchsystem.depends import inject, Provider
 from torchsystem.depends import Depends as Depends
+from torchsystem.services.telemetry import Telemetry
+
+logger = getLogger(__name__)
+
+class Node:
+    def __init__(self):
+        self.children = dict[str, Node]()
+        self.values = list[tuple[int, Any]]()
+
+class Topics:
+    """
+    A trie of hierarchical topic patterns. Topics are split in segments by a separator, and patterns
+    may contain wildcards: `*` matches exactly one segment and `#` matches zero or more segments.
+    For example, `metrics.*` matches `metrics.loss` but not `metrics.train.loss`, while `metrics.#`
+    matches `metrics`, `metrics.loss` and `metrics.train.loss`.
+
+    Values are returned in the order they were inserted, no matter which patterns matched them.
+
+    Methods:
+        insert:
+            Inserts a value under a topic pattern.
+
+        match:
+            Returns the values of all the patterns matching a topic.
+
+    Example:
+        ```python
+        topics = Topics()
+        topics.insert('metrics.*', 'any')
+        topics.insert('metrics.loss', 'loss')
+        topics.match('metrics.loss') # ['any', 'loss']
+        topics.match('metrics.accuracy') # ['any']
+        ```
+    """
+    def __init__(self, separator: str = '.'):
+        self.separator = separator
+        self.root = Node()
+        self.count = 0
+
+    def insert(self, pattern: str, value: Any) -> None:
+        """
+        Inserts a value under a topic pattern.
+
+        Args:
+            pattern (str): The topic pattern, optionally containing `*` and `#` wildcards.
+            value (Any): The value to store.
+        """
+        node = self.root
+        for segment in pattern.split(self.separator):
+            node = node.children.setdefault(segment, Node())
+        node.values.append((self.count, value))
+        self.count += 1
+
+    def match(self, topic: str) -> list[Any]:
+        """
+        Returns the values of all the patterns matching a topic.
+
+        Args:
+            topic (str): The topic to match.
+
+        Returns:
+            list[Any]: The matched values in insertion order.
+        """
+        found = dict[int, Any]()
+        self.collect(self.root, topic.split(self.separator), 0, found)
+        return [found[index] for index in sorted(found)]
+
+    def collect(self, node: Node, segments: list[str], index: int, found: dict[int, Any]):
+        if '#' in node.children:
+            for position in range(index, len(segments) + 1):
+                self.collect(node.children['#'], segments, position, found)
+        if index == len(segments):
+            found.update(node.values)
+            return
+        if segments[index] in node.children:
+            self.collect(node.children[segments[index]], segments, index + 1, found)
+        if '*' in node.children:
+            self.collect(node.children['*'], segments, index + 1, found)
+
+class Subscription:
+    """
+    A handler function wrapped with delivery options. Messages are filtered before the handler
+    is invoked, so a dropped message only costs a counter or clock check, not a dependency
+    resolution and a handler call.
+
+    Args:
+        handler (Callable[..., None]): The injected handler function.
+        every (int, optional): Deliver only every Nth message. Defaults to None.
+        rate (float, optional): The maximum number of messages per second to deliver. Defaults to None.
+        conflate (Callable[[Any], Any] | bool, optional): Keep only the latest message per key while the handler
+            is busy. If a callable is given it is used to compute the key of each message, if True
+            all the messages share the same key. Defaults to False.
+    """
+    def __init__(
+        self, 
+        handler: Callable[..., None],
+        every: int | None = None,
+        rate: float | None = None,
+        conflate: Callable[[Any], Any] | bool = False
+    ):
+        self.handler = handler
+        self.every = every
+        self.interval = 1 / rate if rate else 0.0
+        self.key = conflate if callable(conflate) else (lambda message: None) if conflate else None
+        self.count = 0
+        self.last = float('-inf')
+        self.pending = dict[Any, Any]()
+        self.busy = Lock()
+        self.guard = Lock()
+
+    def __call__(self, message: Any):
+        if self.every:
+            self.count += 1
+            if self.count % self.every:
+                return
+        if self.interval:
+            now = monotonic()
+            if now - self.last < self.interval:
+                return
+            self.last = now
+        if self.key is None:
+            return self.handler(message)
+
+        key = self.key(message)
+        with self.guard:
+            self.pending.pop(key, None)
+            self.pending[key] = message
+        while self.pending and self.busy.acquire(blocking=False):
+            try:
+                while self.pending:
+                    with self.guard:
+                        key = next(iter(self.pending))
+                        message = self.pending.pop(key)
+                    self.handler(message)
+            finally:
+                self.busy.release()
+
+class Buffer:
+    """
+    A fixed size ring buffer with the last messages published to a topic. Numeric payloads (`int` or
+    `float`) are stored in a preallocated array, so recording them doesn't keep python objects alive.
+    The buffer falls back to a list of objects as soon as a message of another type, or an integer that
+    doesn't fit in 64 bits, is recorded.
+
+    Args:
+        capacity (int): The maximum number of messages to keep.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.sequences = array('q', bytes(8 * capacity))
+        self.values: array | list[Any] | None = None
+        self.type: type | None = None
+        self.head = 0
+        self.size = 0
+
+    def append(self, sequence: int, message: Any):
+        values = self.values
+        if values is None or isinstance(values, array) and type(message) is not self.type:
+            values = self.values = self.allocate(values, message)
+        self.sequences[self.head] = sequence
+        try:
+            values[self.head] = message
+        except OverflowError:
+            values = self.values = list(values)
+            values[self.head] = message
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def allocate(self, values: array | None, message: Any) -> array | list[Any]:
+        if values is None and type(message) in (int, float):
+            self.type = type(message)
+            return array('q' if self.type is int else 'd', bytes(8 * self.capacity))
+        return list(values) if values is not None else [None] * self.capacity
+
+    def items(self) -> list[tuple[int, Any]]:
+        """
+        Returns the recorded messages from the oldest to the newest with their sequence numbers.
+        """
+        if self.values is None:
+            return []
+        sequences, values = self.sequences.tolist(), list(self.values)
+        if self.size < self.capacity:
+            return list(zip(sequences[:self.size], values[:self.size]))
+        return list(zip(sequences[self.head:] + sequences[:self.head], values[self.head:] + values[:self.head]))
+
+class Latency:
+    """
+    Delivery statistics of a SUBSCRIBER, collected when messages are fanned out concurrently.
+
+    Attributes:
+        count (int): The number of delivered messages.
+        errors (int): The number of deliveries that raised an exception.
+        total (float): The total time spent delivering messages, in seconds.
+        maximum (float): The longest delivery time, in seconds.
+    """
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.lock = Lock()
+
+    @property
+    def mean(self) -> float:
+        """
+        The average delivery time in seconds.
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def update(self, elapsed: float, failed: bool):
+        with self.lock:
+            self.count += 1
+            self.errors += failed
+            self.total += elapsed
+            self.maximum = max(self.maximum, elapsed)
         
 class Subscriber:
     """
@@ -25,6 +247,11 @@ class Subscriber:
     Unlike a CONSUMER, a SUBSCRIBER receives messages only from the topics it has subscribed to
     and it's the PUBLISHER's responsibility to route the messages accordingly.
 
+    Topics are hierarchical and separated by dots. Handlers can be subscribed to patterns with
+    wildcards: `*` matches exactly one segment and `#` matches zero or more segments, so a handler
+    subscribed to `metrics.#` receives messages published to `metrics.loss` or `metrics.train.loss`.
+    The handlers matching each topic are computed once and cached until a new handler is registered.
+
     Methods:
         register:
             Registers a message type and its corresponding handler function.
@@ -32,6 +259,9 @@ class Subscriber:
         subscribe:
             Decorator for registering a handler function to one or more topics.
 
+        match:
+            Returns the handler functions subscribed to a given topic.
+
         receive:
             Receives a message from a given topic and triggers the corresponding handler functions
             to process it.
@@ -75,10 +305,15 @@ class Subscriber:
         name: str | None = None,
         *,
         provider: Provider | None = None,
+        telemetry: Telemetry | None = None,
     ):
         self.name = name
         self.provider = provider or Provider()
+        self.telemetry = telemetry
         self.handlers = dict[str, list[Callable[..., None]]]()
+        self.topics = Topics()
+        self.matches = dict[str, list[Callable[..., None]]]()
+        self.publishers = list[Publisher]()
     
     @property
     def dependency_overrides(self) -> dict:
@@ -109,24 +344,60 @@ class Subscriber:
         """
         self.dependency_overrides[dependency] = implementation
     
-    def register(self, topic: str, wrapped: Callable[..., None]) -> None:       
+    def register(
+        self, 
+        topic: str, 
+        wrapped: Callable[..., None],
+        *,
+        every: int | None = None,
+        rate: float | None = None,
+        conflate: Callable[[Any], Any] | bool = False
+    ) -> None:       
         """
         Registers a handler function with a given topic.
 
         Args:
-            topic (str): The topic to register the handler function to.
+            topic (str): The topic or topic pattern to register the handler function to.
             wrapped (Callable[..., None]): The handler function to register.
+            every (int, optional): Deliver only every Nth message of the topic. Defaults to None.
+            rate (float, optional): The maximum number of messages per second to deliver. Defaults to None.
+            conflate (Callable[[Any], Any] | bool, optional): Keep only the latest message per key while the handler
+                is busy. Defaults to False.
         """ 
-        injected = inject(self.provider)(wrapped)
+        if self.telemetry:
+            injected = self.telemetry.inject(self.provider, 'subscriber', topic)(wrapped)
+        else:
+            injected = inject(self.provider)(wrapped)
+        if every or rate or conflate:
+            injected = Subscription(injected, every, rate, conflate)
         self.handlers.setdefault(topic, []).append(injected)
+        self.topics.insert(topic, injected)
+        self.matches.clear()
+        for publisher in self.publishers:
+            publisher.routes.clear()
     
-    def subscribe(self, *topics: str) -> Callable[..., None]:
+    def subscribe(
+        self, 
+        *topics: str,
+        every: int | None = None,
+        rate: float | None = None,
+        conflate: Callable[[Any], Any] | bool = False
+    ) -> Callable[..., None]:
         """
         Decorator for registering a handler function to one or more topics. 
 
+        Subscriptions can optionally drop messages before they reach the handler. Use `every` to
+        sample one in N messages, `rate` to limit the number of messages delivered per second, and
+        `conflate` to keep only the latest message per key while the handler is busy (for example
+        when messages are fanned out concurrently). The options apply per topic.
+
         Args:
 
-            *topics (str): The topics to register the handler function to.
+            *topics (str): The topics or topic patterns to register the handler function to.
+            every (int, optional): Deliver only every Nth message. Defaults to None.
+            rate (float, optional): The maximum number of messages per second to deliver. Defaults to None.
+            conflate (Callable[[Any], Any] | bool, optional): Keep only the latest message per key while the
+                handler is busy. If a callable is given it computes the key of each message. Defaults to False.
 
         Returns:
             Callable[..., None]: The decorated handler function.
@@ -138,14 +409,38 @@ class Subscriber:
             @subscriber.subscribe('loss', 'accuracy')
             def store_metric(metric, metrics = Depends(metrics)):
                 ...
+
+            @subscriber.subscribe('metrics.#')
+            def log_metric(metric):
+                ...
+
+            @subscriber.subscribe('metrics', every=10, conflate=lambda metric: metric.name)
+            def plot_metric(metric):
+                ...
             ```
         """
         def handler(wrapped: Callable[..., None]):
             for topic in topics:
-                self.register(topic, wrapped)
+                self.register(topic, wrapped, every=every, rate=rate, conflate=conflate)
             return wrapped
         return handler
 
+    def match(self, topic: str) -> list[Callable[..., None]]:
+        """
+        Returns the handler functions subscribed to a given topic, including the ones subscribed
+        to wildcard patterns matching it. The result is cached per topic.
+
+        Args:
+            topic (str): The topic to match.
+
+        Returns:
+            list[Callable[..., None]]: The handler functions in registration order.
+        """
+        handlers = self.matches.get(topic)
+        if handlers is None:
+            handlers = self.matches[topic] = self.topics.match(topic)
+        return handlers
+
     def receive(self, message: Any, topic: str):
         """
         Receives a message from a given topic and triggers the corresponding handler functions
@@ -183,17 +478,42 @@ class Subscriber:
             # Accuracy: 0.9
             ```        
         """
-        for handler in self.handlers.get(topic, []):
+        handlers = self.matches.get(topic)
+        if handlers is None:
+            handlers = self.match(topic)
+        for handler in handlers:
             handler(message)
 
 class Publisher:
     """
     A PUBLISHER is a component that sends messages to one or more SUBSCRIBERS. Unlike a PRODUCER
     It's the PUBLISHER's responsibility to route the messages to the corresponding SUBSCRIBERS.
+
+    Routes are resolved once per topic and cached, so a message only reaches the SUBSCRIBERS that
+    have at least one handler matching its topic. The cache is invalidated when a SUBSCRIBER is
+    registered or when a registered SUBSCRIBER subscribes a new handler.
+
+    Messages can also be fanned out concurrently to the SUBSCRIBERS on an executor, so a slow
+    SUBSCRIBER doesn't add latency to the caller or to the other SUBSCRIBERS. Exceptions raised
+    by a SUBSCRIBER are isolated from the others, and delivery statistics are kept per SUBSCRIBER
+    in the `latencies` attribute.
+
+    The PUBLISHER can optionally keep the last messages published to each topic in a fixed size
+    ring buffer. SUBSCRIBERS registered later, for example a dashboard attached in the middle of
+    a training run, receive these messages in publication order when they are registered.
+
+    Attributes:
+        subscribers (list[Subscriber]): The registered SUBSCRIBERS.
+        buffers (dict[str, Buffer]): The last messages published per topic when history is enabled.
+        latencies (dict[Subscriber, Latency]): Delivery statistics of the concurrent fan-out per SUBSCRIBER.
     
     Methods:
         register: Registers one or more SUBSCRIBERS to the PUBLISHER.
         publish: Publishes a message to one or more SUBSCRIBERS based on the topic.
+        broadcast: Fans out a message concurrently without waiting for the SUBSCRIBERS.
+        gather: Fans out a message concurrently and waits for the SUBSCRIBERS to process it.
+        shutdown: Shuts down the executor used for the concurrent fan-out.
+        replay: Delivers the recorded messages to a SUBSCRIBER.
 
     Example:    
         ```python	
@@ -208,10 +528,44 @@ class Publisher:
         publisher = Publisher()
         publisher.register(subscriber)
         publisher.publish(0.1, 'loss')
+        publisher.broadcast(0.1, 'loss')
+        errors = publisher.gather(0.1, 'loss', timeout=1.0)
+
+        publisher = Publisher(history=100) # Late subscribers get the last 100 messages per topic.
         ```
     """
-    def __init__(self) -> None:
+    def __init__(self, *, executor: Executor | None = None, history: int = 0) -> None:
+        """
+        Initialize the PUBLISHER.
+
+        Args:
+            executor (Executor, optional): The executor used to fan out messages concurrently. A thread
+                pool is created on first use if not provided. Defaults to None.
+            history (int, optional): The number of messages to keep per topic for SUBSCRIBERS registered
+                later. Defaults to 0, which disables the history.
+        """
         self.subscribers = list[Subscriber]()
+        self.routes = dict[str, list[Subscriber]]()
+        self.executor = executor
+        self.latencies = dict[Subscriber, Latency]()
+        self.history = history
+        self.buffers = dict[str, Buffer]()
+        self.sequence = 0
+
+    def route(self, topic: str) -> list[Subscriber]:
+        """
+        Returns the SUBSCRIBERS with at least one handler matching the topic. The result is cached per topic.
+
+        Args:
+            topic (str): The topic to route.
+
+        Returns:
+            list[Subscriber]: The matching SUBSCRIBERS in registration order.
+        """
+        subscribers = self.routes.get(topic)
+        if subscribers is None:
+            subscribers = self.routes[topic] = [subscriber for subscriber in self.subscribers if subscriber.match(topic)]
+        return subscribers
 
     def publish(self, message: Any, topic: str) -> None:
         """
@@ -221,12 +575,127 @@ class Publisher:
             message (Any): The message to publish.
             topic (str): The topic to publish the message to.
         """
-        for subscriber in self.subscribers:
+        if self.history:
+            self.record(message, topic)
+        subscribers = self.routes.get(topic)
+        if subscribers is None:
+            subscribers = self.route(topic)
+        for subscriber in subscribers:
+            subscriber.receive(message, topic)
+
+    def record(self, message: Any, topic: str) -> None:
+        buffer = self.buffers.get(topic)
+        if buffer is None:
+            buffer = self.buffers[topic] = Buffer(self.history)
+        self.sequence += 1
+        buffer.append(self.sequence, message)
+
+    def replay(self, subscriber: Subscriber) -> None:
+        """
+        Delivers the recorded messages of the topics matching the SUBSCRIBER in publication order.
+
+        Args:
+            subscriber (Subscriber): The SUBSCRIBER to deliver the messages to.
+        """
+        messages = [
+            (sequence, topic, message) 
+            for topic, buffer in self.buffers.items() if subscriber.match(topic)
+            for sequence, message in buffer.items()
+        ]
+        messages.sort(key=lambda item: item[0])
+        for _, topic, message in messages:
             subscriber.receive(message, topic)
 
-    def register(self, *subscribers: Subscriber) -> None:
+    def deliver(self, subscriber: Subscriber, message: Any, topic: str) -> None:
+        start = perf_counter()
+        try:
+            subscriber.receive(message, topic)
+        except BaseException:
+            self.latencies[subscriber].update(perf_counter() - start, True)
+            raise
+        self.latencies[subscriber].update(perf_counter() - start, False)
+
+    def submit(self, subscribers: list[Subscriber], message: Any, topic: str) -> list[Future]:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(thread_name_prefix='publisher')
+        return [self.executor.submit(self.deliver, subscriber, message, topic) for subscriber in subscribers]
+
+    def broadcast(self, message: Any, topic: str) -> list[Future]:
+        """
+        Fans out a message concurrently to the SUBSCRIBERS matching the topic and returns
+        without waiting for them. Exceptions raised by the SUBSCRIBERS are logged and stored
+        in the returned futures.
+
+        Args:
+            message (Any): The message to publish.
+            topic (str): The topic to publish the message to.
+
+        Returns:
+            list[Future]: One future per matching SUBSCRIBER.
         """
-        Registers one or more SUBSCRIBERS to the PUBLISHER.
+        if self.history:
+            self.record(message, topic)
+        futures = self.submit(self.route(topic), message, topic)
+        for future in futures:
+            future.add_done_callback(self.report)
+        return futures
+
+    def report(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f'Error delivering message: {future.exception()!r}')
+
+    def gather(self, message: Any, topic: str, timeout: float | None = None) -> list[tuple[Subscriber, BaseException | None]]:
+        """
+        Fans out a message concurrently to the SUBSCRIBERS matching the topic and waits until
+        all of them processed it or the timeout expires. Exceptions are not raised but returned
+        per SUBSCRIBER, so a failing SUBSCRIBER doesn't affect the others. Deliveries that didn't
+        start when the timeout expires are cancelled.
+
+        Args:
+            message (Any): The message to publish.
+            topic (str): The topic to publish the message to.
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to None.
+
+        Returns:
+            list[tuple[Subscriber, BaseException | None]]: Each matching SUBSCRIBER, in registration order, with the
+                exception it raised, a `TimeoutError` if it didn't finish in time, or None if it succeeded.
+        """
+        if self.history:
+            self.record(message, topic)
+        subscribers = self.route(topic)
+        futures = self.submit(subscribers, message, topic)
+        done, pending = wait(futures, timeout)
+        for future in pending:
+            future.cancel()
+        return [
+            (subscriber, future.exception() if future in done else TimeoutError(f'Subscriber {subscriber.name} timed out'))
+            for subscriber, future in zip(subscribers, futures)
+        ]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shuts down the executor used for the concurrent fan-out.
+
+        Args:
+            wait (bool, optional): Whether to wait for pending deliveries. Defaults to True.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+
+    def register(self, *subscribers: Subscriber, replay: bool = True) -> None:
+        """
+        Registers one or more SUBSCRIBERS to the PUBLISHER. If the history is enabled, the recorded
+        messages are replayed to each SUBSCRIBER.
+
+        Args:
+            replay (bool, optional): Whether to replay the recorded messages. Defaults to True.
         """
         for subscriber in subscribers:
-            self.subscribers.append(subscriber)
\ No newline at end of file
+            self.subscribers.append(subscriber)
+            self.latencies[subscriber] = Latency()
+            subscriber.publishers.append(self)
+        self.routes.clear()
+        if replay and self.buffers:
+            for subscriber in subscribers:
+                self.replay(subscriber)
\ No newline at end of file
@@ -13,9 +13,23 @@
 
 from re import sub
 from typing import Any
+from typing import Iterable
+from typing import Iterator
+from inspect import signature
+from collections import deque
+from typing import overload
+from inspect import iscoroutinefunction
+from functools import partial
+from asyncio import Semaphore, AbstractEventLoop, get_running_loop, wrap_future
+from concurrent.futures import Executor, Future
+from concurrent.futures import wait as wait_futures, FIRST_COMPLETED
 from collections.abc import Callable
-from torchsystem.depends import inject, Provider
+from torchsystem.depends import inject, resolve, Provider
 from torchsystem.depends import Depends as Depends
+from torchsystem.services.batching import Batcher
+from torchsystem.services.telemetry import Telemetry
+from torchsystem.services.cache import Cache
+from torchsystem.services.workers import Workers, Remote
 
 class Service:
     """
@@ -47,6 +61,17 @@ class Service:
         handle:
             Executes the handler associated with a given action.
 
+        ahandle:
+            Executes the handler associated with a given action without blocking the event loop.
+
+        handle_many:
+            Executes the handler associated with a given action for many sets of arguments.
+
+    Handlers can also be executed from an event loop with `ahandle`. Handlers defined with `async def`
+    are awaited natively, while synchronous handlers are offloaded to an executor, a thread pool by
+    default or the one provided to the `Service` constructor. The number of concurrent executions of an
+    action can be limited when registering its handler.
+
     Example:
         ```python	
         from torch import cuda
@@ -64,6 +89,12 @@ class Service:
             ...
 
         service.dependency_overrides[device] = lambda: 'cuda' if cuda.is_available() else 'cpu'
+        
+        @service.handler(concurrency=4)
+        def predict(model: Model, input: Tensor):
+            ...
+
+        output = await service.ahandle('predict', model, input)
         ```
     """
     def __init__(
@@ -71,12 +102,31 @@ class Service:
         name: str | None = None,
         *,
         provider: Provider | None = None,
-        generator: Callable[[str], str] = lambda name: sub(r'_', '-', name)
+        generator: Callable[[str], str] = lambda name: sub(r'_', '-', name),
+        executor: Executor | None = None,
+        telemetry: Telemetry | None = None
     ):
+        """
+        Initialize the SERVICE.
+
+        Args:
+            name (str, optional): The name of the service. Defaults to None.
+            provider (Provider, optional): The dependency provider. Defaults to None.
+            generator (Callable[[str], str], optional): The function generating action names from handler names.
+            executor (Executor, optional): The executor used by `ahandle` to run synchronous handlers. Defaults
+                to the event loop's default thread pool. Process pools require handlers defined at module level.
+            telemetry (Telemetry, optional): Collects call counts and latencies per action. Defaults to None.
+        """
         self.name = name
         self.handlers = dict[str, Callable[..., Any]]()
         self.generator = generator
         self.provider = provider or Provider()
+        self.executor = executor
+        self.telemetry = telemetry
+        self.limits = dict[str, int]()
+        self.caches = dict[str, Cache]()
+        self.functions = dict[str, Callable[..., Any]]()
+        self.semaphores = dict[str, tuple[AbstractEventLoop, Semaphore]]()
 
     @property
     def dependency_overrides(self) -> dict:
@@ -107,20 +157,116 @@ class Service:
         """
         self.dependency_overrides[dependency] = implementation
 
-    def handler(self, wrapped: Callable[..., Any]) -> Callable[..., Any]:
+    @overload
+    def handler(self, wrapped: Callable[..., Any]) -> Callable[..., Any]: ...
+
+    @overload
+    def handler(
+        self, 
+        *, 
+        concurrency: int | None = None, 
+        batch: int | None = None, 
+        wait: float = 0.005,
+        shared: Iterable[str] = (),
+        cache: Cache | None = None,
+        workers: Workers | None = None
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]: ...
+
+    def handler(
+        self, 
+        wrapped: Callable[..., Any] | None = None, 
+        *, 
+        concurrency: int | None = None,
+        batch: int | None = None,
+        wait: float = 0.005,
+        shared: Iterable[str] = (),
+        cache: Cache | None = None,
+        workers: Workers | None = None
+    ) -> Callable[..., Any]:
         """
         Decorator for registering a function as a handler in the service. The handler is
         registered with the name of the function as the key. The handler is also injected
-        with the dependencies provided by the service.
+        with the dependencies provided by the service. Can be used as a raw decorator or
+        with options.
+
+        When a batch size is given, concurrent calls to the action are grouped by a `Batcher`:
+        their tensor arguments are stacked, their other arguments are gathered in lists except
+        the shared ones, which are passed once, the handler is called once per batch, and its output
+        is split back to each caller. Batching only happens when the action is called from several
+        threads at the same time, for example from `ahandle` with a thread pool executor, so it's not
+        supported for handlers defined with `async def`.
+
+        When a `Cache` is given, the results of the action are memoized by the content of its arguments,
+        and a cache hit skips both the dependency resolution and the handler. This should only be used
+        for deterministic handlers. The cache is available in the `caches` attribute of the service.
+
+        When a pool of `Workers` is given, the action is executed in the worker processes instead of
+        the calling process. The handler must be defined at module level and can't be defined with `async def`.
 
         Args:
             wrapped (Callable[..., Any]): The function to be registered as a handler.
+            concurrency (int, optional): The maximum number of concurrent executions of the action
+                when executed with `ahandle`. Defaults to None.
+            batch (int, optional): The maximum number of calls grouped in a batch. Defaults to None,
+                which disables batching.
+            wait (float, optional): The maximum time in seconds a call waits for its batch to be
+                filled. Defaults to 0.005.
+            shared (Iterable[str], optional): The names of the arguments passed once per batch, like
+                the model. Only calls passing the same objects as these arguments are batched together.
+                Defaults to none.
+            cache (Cache, optional): The cache used to memoize the results of the action. Defaults to None.
+            workers (Workers, optional): The pool of worker processes executing the action. Defaults to None.
+
+        Raises:
+            TypeError: If a batch size or workers are given for a handler defined with `async def`.
+            ValueError: If a shared argument is not an argument of the handler.
 
         Returns:
             Callable[..., Any]: The injected handler function.
+
+        Example:
+            ```python
+            @service.handler
+            def train(model: Model, loader: DataLoader):
+                ...
+
+            @service.handler(concurrency=4)
+            async def evaluate(model: Model, input: Tensor):
+                ...
+
+            @service.handler(batch=32, wait=0.01, shared={'model'})
+            def predict(model: Model, inputs: Tensor):
+                return model(inputs)
+            ```
         """
-        injected = inject(self.provider)(wrapped)
-        self.handlers[self.generator(wrapped.__name__)] = injected
+        if wrapped is None:
+            return partial(self.handler, concurrency=concurrency, batch=batch, wait=wait, shared=shared, cache=cache, workers=workers)
+        if batch and iscoroutinefunction(wrapped):
+            raise TypeError(f'Cannot batch the calls to the coroutine function {wrapped.__name__}')
+        if workers and iscoroutinefunction(wrapped):
+            raise TypeError(f'Cannot execute the coroutine function {wrapped.__name__} in worker processes')
+        action = self.generator(wrapped.__name__)
+        if self.telemetry:
+            injected = self.telemetry.inject(self.provider, 'service', action)(wrapped)
+        else:
+            injected = inject(self.provider)(wrapped)
+        handler = Remote(workers, injected) if workers and not Workers.worker else injected
+        if batch:
+            parameters = list(signature(wrapped).parameters)
+            missing = set(shared) - set(parameters)
+            if missing:
+                raise ValueError(f'The handler {wrapped.__name__} has no arguments named {", ".join(sorted(missing))}')
+            handler = Batcher(handler, batch, wait, {parameters.index(name) for name in shared})
+        self.handlers[action] = handler
+        if cache is not None:
+            self.caches[action] = cache
+            self.handlers[action] = cache(self.handlers[action])
+        if self.handlers[action] is injected and not self.telemetry and not iscoroutinefunction(wrapped):
+            self.functions[action] = wrapped
+        else:
+            self.functions.pop(action, None)
+        if concurrency:
+            self.limits[action] = concurrency
         return injected
     
     def handle(self, action: str, *arguments: Any) -> Any:
@@ -159,4 +305,164 @@ class Service:
         handler = self.handlers.get(action, None)
         if not handler:
             raise KeyError(f'Handler not found for action: {action}')
-        return handler(*arguments)
\ No newline at end of file
+        return handler(*arguments)
+
+    def semaphore(self, action: str) -> Semaphore | None:
+        if action not in self.limits:
+            return None
+        loop = get_running_loop()
+        bound, semaphore = self.semaphores.get(action, (None, None))
+        if bound is not loop:
+            semaphore = Semaphore(self.limits[action])
+            self.semaphores[action] = (loop, semaphore)
+        return semaphore
+
+    async def execute(self, handler: Callable[..., Any], *arguments: Any) -> Any:
+        if iscoroutinefunction(handler):
+            return await handler(*arguments)
+        if isinstance(handler, Remote):
+            return await wrap_future(handler.submit(*arguments))
+        return await get_running_loop().run_in_executor(self.executor, partial(handler, *arguments))
+
+    async def ahandle(self, action: str, *arguments: Any) -> Any:
+        """
+        Executes the handler associated with the given action from an event loop. Handlers defined with
+        `async def` are awaited, and synchronous handlers are executed in the service's executor, so the
+        event loop can serve other requests in the meantime. If the handler was registered with a
+        concurrency limit, the call waits until a slot is available.
+
+        Args:
+            action (str): The action to execute the handler for.
+
+        Raises:
+            KeyError: If the handler for the action is not found.
+
+        Returns:
+            Any: Whatever the handler returns.
+
+        Example:
+            ```python
+            service = Service(executor=ThreadPoolExecutor(8))
+
+            @service.handler(concurrency=2)
+            def predict(model: Model, input: Tensor):
+                ...
+
+            outputs = await asyncio.gather(*[service.ahandle('predict', model, input) for input in inputs])
+            ```
+        """
+        handler = self.handlers.get(action, None)
+        if not handler:
+            raise KeyError(f'Handler not found for action: {action}')
+        semaphore = self.semaphore(action)
+        if semaphore is None:
+            return await self.execute(handler, *arguments)
+        async with semaphore:
+            return await self.execute(handler, *arguments)
+
+    def handle_many(
+        self, 
+        action: str, 
+        arguments: Iterable[Any], 
+        *, 
+        executor: Executor | None = None, 
+        ordered: bool = True,
+        buffer: int = 256
+    ) -> Iterator[Any]:
+        """
+        Executes the handler associated with the given action once for each set of arguments and yields
+        the results as a generator. Each item of the iterable is a tuple of positional arguments, or a
+        single argument if it's not a tuple.
+
+        The handler is looked up and its dependencies are resolved only once for the whole batch of calls,
+        and generator dependencies are kept open until the generator is exhausted or closed. Handlers
+        registered with a cache, a batch size or a telemetry are called through their wrappers instead.
+
+        Calls can be executed in parallel on an executor, in which case at most `buffer` calls are in flight
+        at the same time and the results are yielded in the order of the arguments, or as soon as they
+        complete if `ordered` is False. The executor should be a thread pool. If a call raises or the generator
+        is closed early, the calls that didn't start are cancelled and the running ones are waited for before
+        the dependencies are released.
+
+        Args:
+            action (str): The action to execute the handler for.
+            arguments (Iterable[Any]): The arguments of each call.
+            executor (Executor, optional): The executor used to run the calls in parallel. Defaults to None.
+            ordered (bool, optional): Whether results are yielded in the order of the arguments. Defaults to True.
+            buffer (int, optional): The maximum number of calls in flight when using an executor. Defaults to 256.
+
+        Raises:
+            KeyError: If the handler for the action is not found.
+
+        Yields:
+            Any: The result of each call.
+
+        Example:
+            ```python
+            @service.handler
+            def score(model: Model, input: Tensor, device: str = Depends(device)):
+                ...
+
+            for result in service.handle_many('score', ((model, input) for input in inputs)):
+                ...
+            ```
+        """
+        if action not in self.handlers:
+            raise KeyError(f'Handler not found for action: {action}')
+        return self.stream(action, arguments, executor, ordered, buffer)
+
+    def stream(self, action: str, arguments: Iterable[Any], executor: Executor | None, ordered: bool, buffer: int) -> Iterator[Any]:
+        function = self.functions.get(action)
+        if function is None:
+            call, exit_stack = self.handlers[action], None
+        else:
+            call, exit_stack = self.prepare(function)
+
+        def calls() -> Iterator[tuple]:
+            for item in arguments:
+                yield item if isinstance(item, tuple) else (item,)
+
+        def results() -> Iterator[Any]:
+            if executor is None:
+                for item in calls():
+                    yield call(*item)
+                return
+            futures = deque[Future]()
+            try:
+                for item in calls():
+                    futures.append(executor.submit(call, *item))
+                    if len(futures) >= buffer:
+                        yield from self.drain(futures, ordered, buffer - 1)
+                yield from self.drain(futures, ordered, 0)
+            finally:
+                for future in futures:
+                    future.cancel()
+                wait_futures(futures)
+
+        if exit_stack is None:
+            yield from results()
+        else:
+            with exit_stack:
+                yield from results()
+
+    def prepare(self, function: Callable[..., Any]) -> tuple[Callable[..., Any], Any]:
+        function_signature = signature(function)
+        bounded, exit_stack = resolve(function, self.provider)
+        dependencies = dict(bounded.arguments)
+        def call(*arguments: Any) -> Any:
+            bound = function_signature.bind_partial(*arguments)
+            for name, value in dependencies.items():
+                if name not in bound.arguments:
+                    bound.arguments[name] = value
+            return function(*bound.args, **bound.kwargs)
+        return call, exit_stack
+
+    def drain(self, futures: deque[Future], ordered: bool, remaining: int) -> Iterator[Any]:
+        while len(futures) > remaining:
+            if ordered:
+                yield futures.popleft().result()
+            else:
+                done, _ = wait_futures(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    futures.remove(future)
+                    yield future.result()
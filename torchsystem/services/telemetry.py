@@ -0,0 +1,335 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from os import replace
+from json import dumps
+from time import perf_counter_ns
+from typing import Any
+from inspect import iscoroutinefunction
+from functools import wraps
+from threading import Thread, Lock
+from collections.abc import Callable
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from torchsystem.depends import Provider, resolve
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+class Histogram:
+    """
+    A log-linear histogram of durations in nanoseconds, in the style of HDR histograms. Values
+    are counted in buckets whose width grows with their magnitude, so the relative error of the
+    reported quantiles is bounded by the number of significant bits while recording a value is
+    a constant time operation over a preallocated list.
+
+    Args:
+        bits (int, optional): The number of significant bits of the buckets. Defaults to 5, about 3% precision.
+    """
+    def __init__(self, bits: int = 5):
+        self.bits = bits
+        self.half = 1 << (bits - 1)
+        self.counts = [0] * self.index(1 << 42)
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def index(self, value: int) -> int:
+        exponent = value.bit_length() - self.bits
+        if exponent <= 0:
+            return value
+        return exponent * self.half + (value >> exponent)
+
+    def bound(self, index: int) -> int:
+        if index < 2 * self.half:
+            return index
+        exponent = index // self.half - 1
+        return (index - exponent * self.half) << exponent
+
+    def record(self, value: int):
+        """
+        Records a duration.
+
+        Args:
+            value (int): The duration in nanoseconds.
+        """
+        index = self.index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def quantile(self, q: float) -> int:
+        """
+        Returns an estimate of a quantile of the recorded durations.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            int: The estimated duration in nanoseconds.
+        """
+        if not self.count:
+            return 0
+        target = max(1, round(q * self.count))
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min((self.bound(index) + self.bound(index + 1)) // 2, self.maximum)
+        return self.maximum
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.total / 1e9,
+            'max': self.maximum / 1e9,
+            **{f'p{round(q * 100)}': self.quantile(q) / 1e9 for q in QUANTILES}
+        }
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Stats:
+    """
+    The statistics of a handled action, event type or topic. Handlers may run in many threads at
+    once, so the statistics are updated and read under a lock.
+
+    Attributes:
+        calls (int): The number of calls.
+        errors (int): The number of calls that raised an exception.
+        resolve (Histogram): The time spent resolving dependencies.
+        handle (Histogram): The time spent in the handler body.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.resolve = Histogram()
+        self.handle = Histogram()
+        self.lock = Lock()
+
+    def call(self):
+        with self.lock:
+            self.calls += 1
+
+    def fail(self):
+        with self.lock:
+            self.errors += 1
+
+    def record(self, histogram: Histogram, value: int):
+        with self.lock:
+            histogram.record(value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'resolve': self.resolve.snapshot(),
+                'handle': self.handle.snapshot(),
+            }
+
+class Telemetry:
+    """
+    A TELEMETRY collects call counts, error counts and latency histograms for the handlers of
+    `Service`, `Consumer` and `Subscriber` instances. The time spent resolving dependencies and
+    the time spent in the handler body are measured separately.
+
+    Statistics are grouped by kind (`service`, `consumer` or `subscriber`) and by action, event
+    type or topic. They can be exported as a dictionary, as Prometheus text, written to a file
+    (for example for a node exporter textfile collector) or served from a local HTTP endpoint.
+
+    Instrumentation is opt-in: handlers of components created without a telemetry pay nothing.
+
+    Example:
+        ```python
+        from torchsystem.services import Service
+        from torchsystem.services.telemetry import Telemetry
+
+        telemetry = Telemetry()
+        service = Service(telemetry=telemetry)
+        ...
+
+        service.handle('train', model, loader)
+        print(telemetry.snapshot()['service']['train']['handle']['p99'])
+        telemetry.write('data/metrics.prom')
+        server = telemetry.serve(9100) # http://127.0.0.1:9100/metrics
+        ```
+    """
+    def __init__(self):
+        self.stats = dict[tuple[str, str], Stats]()
+        self.lock = Lock()
+
+    def get(self, kind: str, name: str) -> Stats:
+        """
+        Returns the statistics of an action, event type or topic, creating them if needed.
+
+        Args:
+            kind (str): The kind of component.
+            name (str): The name of the action, event type or topic.
+
+        Returns:
+            Stats: The statistics.
+        """
+        with self.lock:
+            return self.stats.setdefault((kind, name), Stats())
+
+    def inject(self, provider: Provider, kind: str, name: str) -> Callable[[Callable], Callable]:
+        """
+        Works as `torchsystem.depends.inject` but records the statistics of each call.
+
+        Args:
+            provider (Provider): The dependency provider.
+            kind (str): The kind of component.
+            name (str): The name of the action, event type or topic.
+
+        Returns:
+            Callable[[Callable], Callable]: A decorator injecting and instrumenting a function.
+        """
+        stats = self.get(kind, name)
+        def decorator(function: Callable):
+            if iscoroutinefunction(function):
+                @wraps(function)
+                async def coroutine(*args, **kwargs):
+                    start = perf_counter_ns()
+                    stats.call()
+                    try:
+                        bounded, exit_stack = resolve(function, provider, *args, **kwargs)
+                    except BaseException:
+                        stats.fail()
+                        raise
+                    resolved = perf_counter_ns()
+                    stats.record(stats.resolve, resolved - start)
+                    try:
+                        with exit_stack:
+                            return await function(*bounded.args, **bounded.kwargs)
+                    except BaseException:
+                        stats.fail()
+                        raise
+                    finally:
+                        stats.record(stats.handle, perf_counter_ns() - resolved)
+                return coroutine
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                start = perf_counter_ns()
+                stats.call()
+                try:
+                    bounded, exit_stack = resolve(function, provider, *args, **kwargs)
+                except BaseException:
+                    stats.fail()
+                    raise
+                resolved = perf_counter_ns()
+                stats.record(stats.resolve, resolved - start)
+                try:
+                    with exit_stack:
+                        return function(*bounded.args, **bounded.kwargs)
+                except BaseException:
+                    stats.fail()
+                    raise
+                finally:
+                    stats.record(stats.handle, perf_counter_ns() - resolved)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns the statistics as a dictionary grouped by kind and name. Durations are in seconds.
+
+        Returns:
+            dict[str, dict[str, Any]]: The statistics.
+        """
+        snapshot = dict[str, dict[str, Any]]()
+        with self.lock:
+            items = list(self.stats.items())
+        for (kind, name), stats in items:
+            snapshot.setdefault(kind, {})[name] = stats.snapshot()
+        return snapshot
+
+    def prometheus(self, prefix: str = 'torchsystem') -> str:
+        """
+        Returns the statistics in the Prometheus text exposition format. Backslashes, double quotes and
+        newlines in label values are escaped as the format specifies.
+
+        Args:
+            prefix (str, optional): The prefix of the metric names. Defaults to 'torchsystem'.
+
+        Returns:
+            str: The statistics as Prometheus text.
+        """
+        with self.lock:
+            items = list(self.stats.items())
+        snapshots = [(escape(kind), escape(name), stats.snapshot()) for (kind, name), stats in items]
+        lines = [f'# TYPE {prefix}_calls_total counter']
+        lines.extend(f'{prefix}_calls_total{{kind="{kind}",name="{name}"}} {snapshot["calls"]}' for kind, name, snapshot in snapshots)
+        lines.append(f'# TYPE {prefix}_errors_total counter')
+        lines.extend(f'{prefix}_errors_total{{kind="{kind}",name="{name}"}} {snapshot["errors"]}' for kind, name, snapshot in snapshots)
+        lines.append(f'# TYPE {prefix}_duration_seconds summary')
+        for kind, name, snapshot in snapshots:
+            for stage in ('resolve', 'handle'):
+                labels = f'kind="{kind}",name="{name}",stage="{stage}"'
+                for q in QUANTILES:
+                    lines.append(f'{prefix}_duration_seconds{{{labels},quantile="{q}"}} {snapshot[stage][f"p{round(q * 100)}"]}')
+                lines.append(f'{prefix}_duration_seconds_sum{{{labels}}} {snapshot[stage]["sum"]}')
+                lines.append(f'{prefix}_duration_seconds_count{{{labels}}} {snapshot[stage]["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str, prefix: str = 'torchsystem'):
+        """
+        Atomically writes the statistics to a file in the Prometheus text exposition format.
+
+        Args:
+            path (str): The path of the file.
+            prefix (str, optional): The prefix of the metric names. Defaults to 'torchsystem'.
+        """
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as file:
+            file.write(self.prometheus(prefix))
+        replace(temporary, path)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """
+        Serves the statistics from a local HTTP endpoint on a background thread. The Prometheus
+        text is served at `/metrics` and the JSON snapshot at `/snapshot`.
+
+        Args:
+            port (int): The port to listen on. Use 0 to pick a free port.
+            host (str, optional): The host to listen on. Defaults to '127.0.0.1'.
+
+        Returns:
+            ThreadingHTTPServer: The running server. Call its `shutdown` method to stop it.
+        """
+        telemetry = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content = telemetry.prometheus().encode(), 'text/plain; version=0.0.4'
+                elif self.path == '/snapshot':
+                    body, content = dumps(telemetry.snapshot()).encode(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        return server
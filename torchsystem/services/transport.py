@@ -0,0 +1,319 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from time import monotonic
+from pickle import dumps, loads, HIGHEST_PROTOCOL
+from struct import Struct, error as StructError
+from queue import Queue, Empty
+from typing import Any
+from typing import Literal
+from threading import Thread, Lock
+from collections import OrderedDict
+from collections.abc import Callable
+from multiprocessing.connection import Listener, Client, Connection
+
+from torchsystem.depends import Provider
+from torchsystem.services.pubsub import Subscriber
+from torchsystem.services.pubsub import Publisher
+
+type Delivery = Literal['at-most-once', 'at-least-once']
+
+ACK = Struct('<Q')
+
+def encode(batch: tuple) -> bytes:
+    return dumps(batch, protocol=HIGHEST_PROTOCOL)
+
+def decode(payload: bytes) -> tuple:
+    return loads(payload)
+
+class Sender(Subscriber):
+    """
+    A SENDER is a SUBSCRIBER that forwards the messages it receives to SUBSCRIBERS running in other
+    local processes. It listens on a local address (a Unix domain socket path, a named pipe on Windows
+    or a localhost `(host, port)` tuple), and any number of `Receiver`s can connect to it.
+
+    Messages are buffered and sent on a background thread in batches, so publishing a message only
+    costs putting it in a queue. A batch is sent when it reaches the maximum batch size or when the
+    flush interval expires, and is encoded as a single payload.
+
+    Batches are encoded with pickle by default, and unpickling data can run arbitrary code, so an `authkey`
+    shared with the receivers is required unless a custom encoder is given, for example one built from
+    `Codec`s. Acknowledgements are fixed size integers and are never unpickled.
+
+    Two delivery modes are supported:
+
+    - `at-most-once`: batches are sent to the connected receivers and dropped afterwards. Messages
+      published while no receiver is connected are lost.
+
+    - `at-least-once`: batches are kept until every connected receiver acknowledges them. Pending batches
+      are sent to receivers when they connect, so a receiver that reconnects may see some batches twice. At
+      most `max_pending` batches are kept: when receivers don't acknowledge them for a long time, the
+      oldest ones are dropped to bound the memory used by the SENDER.
+
+    Args:
+        address (Any): The address to listen on.
+        *topics (str): The topics or topic patterns to forward. Defaults to all topics.
+        delivery (Delivery, optional): The delivery mode. Defaults to 'at-most-once'.
+        batch (int, optional): The maximum number of messages per batch. Defaults to 64.
+        interval (float, optional): The maximum number of seconds a message waits to be sent. Defaults to 0.05.
+        authkey (bytes, optional): The key used to authenticate the receivers. Required with the default encoder.
+        encoder (Callable[[tuple], bytes], optional): The function used to encode the batches. Defaults to pickle.
+        max_pending (int, optional): The maximum number of unacknowledged batches kept in `at-least-once` mode.
+            Defaults to 1024. None keeps them all.
+
+    Raises:
+        ValueError: If the batches are pickled and no authkey is given.
+
+    Example:
+        ```python
+        from torchsystem.services import Publisher
+        from torchsystem.services.transport import Sender
+
+        publisher = Publisher()
+        sender = Sender('/tmp/metrics.sock', 'metrics.#', delivery='at-least-once', authkey=b'secret')
+        publisher.register(sender)
+        ...
+        publisher.publish(metric, 'metrics.loss')
+        ...
+        sender.close()
+        ```
+    """
+    def __init__(
+        self,
+        address: Any,
+        *topics: str,
+        delivery: Delivery = 'at-most-once',
+        batch: int = 64,
+        interval: float = 0.05,
+        authkey: bytes | None = None,
+        encoder: Callable[[tuple], bytes] = encode,
+        max_pending: int | None = 1024,
+        name: str | None = None,
+        provider: Provider | None = None,
+    ):
+        if encoder is encode and authkey is None:
+            raise ValueError('An authkey is required to send pickled batches')
+        super().__init__(name, provider=provider)
+        for topic in topics or ('#',):
+            self.topics.insert(topic, topic)
+        self.delivery = delivery
+        self.batch = batch
+        self.interval = interval
+        self.encoder = encoder
+        self.max_pending = max_pending
+        self.sequence = 0
+        self.queue = Queue[tuple[str, Any] | None]()
+        self.pending = OrderedDict[int, bytes]()
+        self.connections = list[Connection]()
+        self.acknowledged = dict[Connection, int]()
+        self.incoming = list[Connection]()
+        self.lock = Lock()
+        self.listener = Listener(address, authkey=authkey)
+        self.acceptor = Thread(target=self.accept, daemon=True)
+        self.flusher = Thread(target=self.flush, daemon=True)
+        self.acceptor.start()
+        self.flusher.start()
+
+    @property
+    def address(self) -> Any:
+        """
+        The address the SENDER is listening on.
+        """
+        return self.listener.address
+
+    def receive(self, message: Any, topic: str):
+        """
+        Queues a message to be sent to the connected receivers if its topic matches one of the
+        forwarded topics.
+
+        Args:
+            message (Any): The message to send. Should be serializable by the encoder.
+            topic (str): The topic of the message.
+        """
+        if self.match(topic):
+            self.queue.put((topic, message))
+
+    def accept(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.incoming.append(connection)
+
+    def flush(self):
+        closed = False
+        while not closed:
+            messages = list[tuple[str, Any]]()
+            deadline = monotonic() + self.interval
+            while len(messages) < self.batch:
+                try:
+                    item = self.queue.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+                if item is None:
+                    closed = True
+                    break
+                messages.append(item)
+            self.adopt()
+            if messages:
+                self.send(messages)
+            self.acknowledge()
+
+    def adopt(self):
+        with self.lock:
+            incoming, self.incoming = self.incoming, []
+        for connection in incoming:
+            if self.write(connection, *self.pending.values()):
+                self.connections.append(connection)
+                self.acknowledged[connection] = 0
+
+    def send(self, messages: list[tuple[str, Any]]):
+        self.sequence += 1
+        payload = self.encoder((self.sequence, self.delivery == 'at-least-once', messages))
+        if self.delivery == 'at-least-once':
+            self.pending[self.sequence] = payload
+            while self.max_pending is not None and len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+        self.connections = [connection for connection in self.connections if self.write(connection, payload)]
+
+    def write(self, connection: Connection, *payloads: bytes) -> bool:
+        try:
+            for payload in payloads:
+                connection.send_bytes(payload)
+            return True
+        except OSError:
+            self.drop(connection)
+            return False
+
+    def drop(self, connection: Connection):
+        connection.close()
+        self.acknowledged.pop(connection, None)
+
+    def acknowledge(self):
+        connections = list[Connection]()
+        for connection in self.connections:
+            try:
+                while connection.poll():
+                    (sequence,) = ACK.unpack(connection.recv_bytes(ACK.size))
+                    self.acknowledged[connection] = max(self.acknowledged[connection], sequence)
+            except (OSError, EOFError, StructError):
+                self.drop(connection)
+                continue
+            connections.append(connection)
+        self.connections = connections
+        if connections:
+            sequence = min(self.acknowledged[connection] for connection in connections)
+            while self.pending and next(iter(self.pending)) <= sequence:
+                self.pending.popitem(last=False)
+
+    def close(self):
+        """
+        Sends the queued messages and closes the SENDER and its connections.
+        """
+        self.queue.put(None)
+        self.flusher.join()
+        self.listener.close()
+        for connection in self.connections + self.incoming:
+            connection.close()
+
+
+class Receiver:
+    """
+    A RECEIVER connects to a `Sender` running in another local process and delivers the messages it
+    sends to local SUBSCRIBERS, routing them by topic exactly as a PUBLISHER would.
+
+    Args:
+        address (Any): The address of the `Sender`.
+        *subscribers (Subscriber): The SUBSCRIBERS to deliver the messages to.
+        authkey (bytes, optional): The key used to authenticate with the `Sender`. Required with the default decoder.
+        decoder (Callable[[bytes], tuple], optional): The function used to decode the batches. Defaults to pickle.
+
+    Raises:
+        ValueError: If the batches are unpickled and no authkey is given.
+
+    Example:
+        ```python
+        from torchsystem.services import Subscriber
+        from torchsystem.services.transport import Receiver
+
+        subscriber = Subscriber()
+
+        @subscriber.subscribe('metrics.#')
+        def plot(metric):
+            ...
+
+        receiver = Receiver('/tmp/metrics.sock', subscriber, authkey=b'secret')
+        receiver.run() # Blocks until the sender is closed.
+        ```
+    """
+    def __init__(
+        self,
+        address: Any,
+        *subscribers: Subscriber,
+        authkey: bytes | None = None,
+        decoder: Callable[[bytes], tuple] = decode,
+    ):
+        if decoder is decode and authkey is None:
+            raise ValueError('An authkey is required to receive pickled batches')
+        self.address = address
+        self.authkey = authkey
+        self.decoder = decoder
+        self.publisher = Publisher()
+        self.publisher.register(*subscribers)
+        self.connection: Connection | None = None
+
+    def register(self, *subscribers: Subscriber):
+        """
+        Registers one or more SUBSCRIBERS to the RECEIVER.
+        """
+        self.publisher.register(*subscribers)
+
+    def connect(self):
+        """
+        Connects to the `Sender`. Called by `run` if the RECEIVER is not connected yet.
+        """
+        self.connection = Client(self.address, authkey=self.authkey)
+
+    def run(self):
+        """
+        Connects to the `Sender` and delivers the received messages until the connection is closed.
+        Batches are acknowledged after all their messages were delivered when the `Sender` uses
+        the at-least-once delivery mode.
+        """
+        if self.connection is None:
+            self.connect()
+        try:
+            while True:
+                try:
+                    payload = self.connection.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                sequence, acknowledge, messages = self.decoder(payload)
+                for topic, message in messages:
+                    self.publisher.publish(message, topic)
+                if acknowledge:
+                    try:
+                        self.connection.send_bytes(ACK.pack(sequence))
+                    except OSError:
+                        continue # The sender is closing, batches already sent can still be read.
+        finally:
+            self.connection.close()
+
+    def close(self):
+        """
+        Closes the connection with the `Sender`.
+        """
+        if self.connection is not None:
+            self.connection.close()
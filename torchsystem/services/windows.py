@@ -0,0 +1,207 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from math import nan
+from array import array
+from typing import Any
+from collections.abc import Callable
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+import torch
+
+from torchsystem.depends import Provider
+from torchsystem.services.pubsub import Subscriber
+from torchsystem.services.pubsub import Publisher
+
+@dataclass
+class Summary:
+    """
+    A summary of the last values of a metric.
+
+    Attributes:
+        name (str): The name of the metric.
+        count (int): The total number of values received for the metric.
+        mean (float): The mean of the values in the window.
+        minimum (float): The minimum of the values in the window.
+        maximum (float): The maximum of the values in the window.
+        ema (float): The exponential moving average of all the values received.
+        quantiles (dict[float, float]): The quantiles of the values in the window.
+    """
+    name: str
+    count: int
+    mean: float
+    minimum: float
+    maximum: float
+    ema: float
+    quantiles: dict[float, float] = field(default_factory=dict)
+
+class Window:
+    """
+    A rolling window over the last values of a metric. Incoming values are staged in a plain
+    `array` and written to a preallocated tensor in a single vectorized update when the window
+    is flushed, so receiving a value doesn't allocate python objects.
+
+    Args:
+        size (int): The number of values kept in the window.
+        alpha (float): The smoothing factor of the exponential moving average.
+    """
+    def __init__(self, size: int, alpha: float):
+        self.size = size
+        self.alpha = alpha
+        self.values = torch.zeros(size, dtype=torch.float64)
+        self.staged = array('d')
+        self.count = 0
+        self.ema = nan
+
+    def append(self, value: float):
+        self.staged.append(value)
+
+    def flush(self):
+        if not self.staged:
+            return
+        chunk = torch.frombuffer(self.staged, dtype=torch.float64).clone()
+        self.staged = array('d')
+        if self.count == 0:
+            self.ema = chunk[0].item()
+        decay = 1 - self.alpha
+        weights = self.alpha * decay ** torch.arange(len(chunk) - 1, -1, -1, dtype=torch.float64)
+        self.ema = decay ** len(chunk) * self.ema + torch.dot(weights, chunk).item()
+        tail = chunk[-self.size:]
+        positions = (self.count + len(chunk) - len(tail) + torch.arange(len(tail))) % self.size
+        self.values[positions] = tail
+        self.count += len(chunk)
+
+    def summarize(self, name: str, quantiles: Sequence[float]) -> Summary:
+        self.flush()
+        values = self.values[:min(self.count, self.size)]
+        if not len(values):
+            return Summary(name, 0, nan, nan, nan, nan, {quantile: nan for quantile in quantiles})
+        points = torch.quantile(values, torch.tensor(quantiles, dtype=torch.float64)).tolist() if quantiles else []
+        return Summary(
+            name=name,
+            count=self.count,
+            mean=values.mean().item(),
+            minimum=values.min().item(),
+            maximum=values.max().item(),
+            ema=self.ema,
+            quantiles=dict(zip(quantiles, points))
+        )
+
+def measure(message: Any) -> tuple[str, float]:
+    if isinstance(message, dict):
+        return message['name'], float(message['value'])
+    return message.name, float(message.value)
+
+class Summarizer(Subscriber):
+    """
+    A SUMMARIZER is a SUBSCRIBER that keeps rolling windows over the metrics published to some
+    topics and publishes their summaries (mean, min, max, exponential moving average and quantiles)
+    to a downstream topic every given number of values of each metric.
+
+    Metrics are identified by name. By default messages are expected to have `name` and `value`
+    attributes or keys, and a custom function can be passed to extract them from other messages.
+
+    Args:
+        publisher (Publisher): The PUBLISHER used to publish the summaries.
+        *topics (str): The topics or topic patterns with the metrics to summarize.
+        window (int, optional): The number of values kept per metric. Defaults to 100.
+        every (int, optional): The number of values of a metric between summaries. Defaults to 100.
+        alpha (float, optional): The smoothing factor of the exponential moving average. Defaults to 0.1.
+        quantiles (Sequence[float], optional): The quantiles to compute. Defaults to (0.5, 0.9, 0.99).
+        topic (str, optional): The topic where the summaries are published. Defaults to 'summaries'.
+        key (Callable[[Any], tuple[str, float]], optional): A function returning the name and value of a message.
+
+    Example:
+        ```python
+        from torchsystem.services import Publisher, Subscriber
+        from torchsystem.services.windows import Summarizer, Summary
+
+        publisher = Publisher()
+        subscriber = Subscriber()
+
+        @subscriber.subscribe('summaries')
+        def log_summary(summary: Summary):
+            print(f"{summary.name}: mean={summary.mean}, p99={summary.quantiles[0.99]}")
+
+        publisher.register(Summarizer(publisher, 'metrics', window=50, every=10), subscriber)
+        ...
+        publisher.publish(Metric(name='loss', value=loss.item()), 'metrics')
+        ```
+    """
+    def __init__(
+        self,
+        publisher: Publisher,
+        *topics: str,
+        window: int = 100,
+        every: int = 100,
+        alpha: float = 0.1,
+        quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+        topic: str = 'summaries',
+        key: Callable[[Any], tuple[str, float]] = measure,
+        name: str | None = None,
+        provider: Provider | None = None,
+    ):
+        super().__init__(name, provider=provider)
+        for pattern in topics:
+            self.topics.insert(pattern, pattern)
+        self.publisher = publisher
+        self.window = window
+        self.every = every
+        self.alpha = alpha
+        self.quantiles = tuple(quantiles)
+        self.topic = topic
+        self.key = key
+        self.windows = dict[str, Window]()
+
+    def receive(self, message: Any, topic: str):
+        """
+        Adds the value of a metric to its window and publishes the summary of the metric
+        when the cadence is reached.
+
+        Args:
+            message (Any): The metric.
+            topic (str): The topic of the metric.
+        """
+        if not self.match(topic):
+            return
+        name, value = self.key(message)
+        window = self.windows.get(name)
+        if window is None:
+            window = self.windows[name] = Window(self.window, self.alpha)
+        window.append(value)
+        if len(window.staged) >= self.every:
+            self.publisher.publish(window.summarize(name, self.quantiles), self.topic)
+
+    def summarize(self, name: str) -> Summary:
+        """
+        Returns the current summary of a metric.
+
+        Args:
+            name (str): The name of the metric.
+
+        Raises:
+            KeyError: If no value was received for the metric.
+
+        Returns:
+            Summary: The summary of the metric.
+        """
+        return self.windows[name].summarize(name, self.quantiles)
+
+    def flush(self):
+        """
+        Publishes the summaries of all the metrics with values received since their last summary.
+        """
+        for name, window in self.windows.items():
+            if window.staged:
+                self.publisher.publish(window.summarize(name, self.quantiles), self.topic)
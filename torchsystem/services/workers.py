@@ -0,0 +1,126 @@
+# Copyright 2024 Eric Hermosis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You can obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# This software is distributed "AS IS," without warranties or conditions.
+# See the License for specific terms.
+#
+# For inquiries, visit: entropy-flux.github.io/TorchSystem/
+
+from typing import Any
+from importlib import import_module
+from threading import Lock
+from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+
+from torch import multiprocessing
+
+def initialize(modules: tuple[str, ...]):
+    Workers.worker = True
+    for module in modules:
+        import_module(module)
+
+class Workers:
+    """
+    A pool of worker processes that execute the handlers of a `Service`, so CPU heavy handlers
+    (data preprocessing, CPU inference) don't compete for the GIL of the main process.
+
+    The workers are started once, on the first call, and import the given modules before receiving
+    any work. Handlers and their state (for example a model loaded at module level or cached by a
+    dependency) are kept warm in each worker between calls, so a call only costs sending its
+    arguments and receiving its result. Tensors are sent through shared memory by the reductions
+    of `torch.multiprocessing`, so large inputs and outputs are not copied through a pipe.
+
+    Handlers executed by the workers must be defined at module level in an importable module,
+    since they are sent to the workers by reference. Inside a worker, the handlers registered with
+    the pool run locally.
+
+    Args:
+        *modules (str): The modules to import in each worker when it starts.
+        processes (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        method (str, optional): The start method of the processes. Defaults to 'spawn'.
+
+    Example:
+        ```python
+        # src/inference.py
+        from torchsystem.services import Service
+        from torchsystem.services.workers import Workers
+
+        workers = Workers('src.inference', processes=4)
+        service = Service()
+
+        @service.handler(workers=workers)
+        def predict(input: Tensor, model: Model = Depends(model)):
+            with inference_mode():
+                return model(input)
+
+        # main.py
+        from src.inference import service
+        output = service.handle('predict', input)
+        output = await service.ahandle('predict', input)
+        ```
+    """
+    worker = False
+
+    def __init__(self, *modules: str, processes: int | None = None, method: str = 'spawn'):
+        self.modules = modules
+        self.processes = processes
+        self.method = method
+        self.executor: ProcessPoolExecutor | None = None
+        self.lock = Lock()
+
+    def submit(self, function: Callable[..., Any], *arguments: Any) -> Future:
+        """
+        Submits a call to the workers, starting them if needed.
+
+        Args:
+            function (Callable[..., Any]): A function defined at module level.
+
+        Returns:
+            Future: The future result of the call.
+        """
+        if self.executor is None:
+            with self.lock:
+                if self.executor is None:
+                    self.executor = ProcessPoolExecutor(
+                        max_workers=self.processes,
+                        mp_context=multiprocessing.get_context(self.method),
+                        initializer=initialize,
+                        initargs=(self.modules,)
+                    )
+        return self.executor.submit(function, *arguments)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the worker processes. They are started again on the next call.
+
+        Args:
+            wait (bool, optional): Whether to wait for the pending calls. Defaults to True.
+        """
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=wait)
+                self.executor = None
+
+class Remote:
+    """
+    A handler executed by a pool of `Workers`.
+
+    Args:
+        workers (Workers): The pool of workers.
+        handler (Callable[..., Any]): The injected handler, defined at module level.
+    """
+    def __init__(self, workers: Workers, handler: Callable[..., Any]):
+        self.workers = workers
+        self.handler = handler
+
+    def submit(self, *arguments: Any) -> Future:
+        return self.workers.submit(self.handler, *arguments)
+
+    def __call__(self, *arguments: Any) -> Any:
+        return self.submit(*arguments).result()